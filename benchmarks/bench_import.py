@@ -0,0 +1,122 @@
+"""Import time of the plugin modules every Mailman process loads.
+
+Mailman imports the plugin's hooks and every module of its commands,
+handlers, pipelines and styles packages after its own initialization, then
+runs post_hook. For each of these modules the script runs `python -X
+importtime` in a fresh interpreter with Mailman's test configuration set up
+first, so only the plugin's own share is counted, and reports the cumulative
+import time and the run time of post_hook. The script fails if a module can
+not be imported or imports a deferred module, and with --max-ms if a module
+takes longer, e.g. in CI:
+
+    python benchmarks/bench_import.py --max-ms 50
+
+Needs an environment with Mailman installed. brandwerder_plugin/tests/
+test_import.py checks the imports with the test suite.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# subpackages searched for components by Mailman
+PACKAGES = ('commands', 'handlers', 'pipelines', 'styles')
+
+# only needed by the REST runner, must not be imported by the modules above
+DEFERRED = (
+    'brandwerder_plugin.resource',
+)
+
+SETUP = """\
+from mailman.testing.layers import ConfigLayer
+ConfigLayer.setUp()
+"""
+
+POST_HOOK = """\
+import time
+from brandwerder_plugin.hooks import BrandwerderPlugin
+start = time.perf_counter()
+BrandwerderPlugin().post_hook()
+print(time.perf_counter() - start)
+"""
+
+
+def modules():
+    yield 'brandwerder_plugin.hooks'
+    for package in PACKAGES:
+        directory = os.path.join(ROOT, 'brandwerder_plugin', package)
+        for filename in sorted(os.listdir(directory)):
+            name, extension = os.path.splitext(filename)
+            if extension == '.py' and name != '__init__':
+                yield 'brandwerder_plugin.{}.{}'.format(package, name)
+
+
+def run(code, importtime=False):
+    code = SETUP + code + 'ConfigLayer.tearDown()\n'
+    options = ['-X', 'importtime'] if importtime else []
+    return subprocess.run(
+        [sys.executable] + options + ['-c', code], cwd=ROOT,
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        universal_newlines=True)
+
+
+def import_times(module):
+    """Return {module: cumulative microseconds} of importing `module`, None
+    if it can not be imported."""
+    result = run('import {}\n'.format(module), importtime=True)
+    if result.returncode:
+        sys.stderr.writelines(
+            line for line in result.stderr.splitlines(True)
+            if not line.startswith('import time:'))
+        return None
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def post_hook_seconds():
+    result = run(POST_HOOK)
+    if result.returncode:
+        sys.stderr.write(result.stderr)
+        return None
+    return float(result.stdout.split()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--max-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    failed = False
+    for module in modules():
+        times = import_times(module)
+        if times is None:
+            print('{:<50} import failed'.format(module))
+            failed = True
+            continue
+        milliseconds = times.get(module, 0) / 1000
+        deferred = [name for name in DEFERRED if name in times]
+        print('{:<50} {:8.1f}ms {}'.format(
+            module, milliseconds,
+            'eager: ' + ', '.join(deferred) if deferred else ''))
+        if deferred or (args.max_ms is not None and milliseconds > args.max_ms):
+            failed = True
+
+    seconds = post_hook_seconds()
+    if seconds is None:
+        print('{:<50} failed'.format('post_hook'))
+        failed = True
+    else:
+        print('{:<50} {:8.1f}ms'.format('post_hook', seconds * 1000))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
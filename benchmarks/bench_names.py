@@ -0,0 +1,43 @@
+"""Compare the compiled naming rules with the former per-call regex path.
+
+Usage: python benchmarks/bench_names.py [count]
+"""
+
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from brandwerder_plugin.styles.brandwerder_names import (  # noqa: E402
+    klassenlist_name, resolve_list_name, resolve_list_names)
+
+
+def regex_path(list_name):
+    # what BrandwerderStyle.apply did before the rule table
+    display_name = re.sub(r'klasse-(.*)', klassenlist_name, list_name)
+    return display_name, bool(re.match('klasse', list_name))
+
+
+def list_names(count):
+    names = ['klasse-{}{}'.format(year, letter)
+             for year in range(1, 7) for letter in 'abcdef']
+    names += ['elternvertreter', 'lehrer', 'klasse-a{}'.format(3)]
+    return [names[i % len(names)] for i in range(count)]
+
+
+def main(count=100000):
+    names = list_names(count)
+    resolve_list_name.cache_clear()
+    results = {
+        'regex': timeit.timeit(lambda: [regex_path(n) for n in names], number=1),
+        'resolve': timeit.timeit(lambda: [resolve_list_name(n) for n in names], number=1),
+        'resolve_many': timeit.timeit(lambda: resolve_list_names(names), number=1),
+    }
+    for name, seconds in results.items():
+        print('{:<14} {:8.4f}s  {:10.0f} names/s'.format(name, seconds, count / seconds))
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
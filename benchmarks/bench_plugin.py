@@ -0,0 +1,315 @@
+"""Benchmarks of the plugin's hot paths, with JSON results for comparisons.
+
+Runs the style, the list naming, the template binding and the rendering of
+the german templates for synthetic lists at several scales. Mailman itself is
+not running: IStyleManager and ITemplateManager are stub utilities and the
+database is an in-memory stand-in, so only the plugin's own code is measured.
+
+    python benchmarks/bench_plugin.py --output before.json
+    ... change things ...
+    python benchmarks/bench_plugin.py --output after.json --compare before.json
+
+With --compare the script exits with status 1 if a case got slower by more
+than --threshold (default 20%). Needs an environment with Mailman installed.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from string import Template
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from mailman.config import config  # noqa: E402
+from mailman.interfaces.styles import IStyle, IStyleManager  # noqa: E402
+from mailman.interfaces.template import ITemplateManager  # noqa: E402
+from zope.component import getGlobalSiteManager  # noqa: E402
+from zope.interface import implementer  # noqa: E402
+
+SCALES = (10, 1000, 100000)
+DOMAIN = 'lists.brandwerder.de'
+
+
+@implementer(IStyle)
+class StubStyle:
+    name = 'legacy-default'
+    description = 'legacy-default stand-in'
+
+    def apply(self, mailing_list):
+        mailing_list.send_welcome_message = True
+
+
+@implementer(IStyleManager)
+class StubStyleManager:
+    def __init__(self):
+        self._styles = {'legacy-default': StubStyle()}
+
+    def get(self, name):
+        return self._styles.get(name)
+
+    @property
+    def styles(self):
+        return iter(self._styles.values())
+
+
+class StubTemplate:
+    __slots__ = ('name', 'context', 'uri', 'username', 'password')
+
+    def __init__(self, name, context, uri, username, password):
+        self.name = name
+        self.context = context
+        self.uri = uri
+        self.username = username
+        self.password = password
+
+
+@implementer(ITemplateManager)
+class StubTemplateManager:
+    def __init__(self):
+        self.templates = {}
+
+    def set(self, name, context, uri, username=None, password=''):
+        self.templates[(name, context)] = StubTemplate(
+            name, context, uri, username, password)
+
+    def raw(self, name, context):
+        return self.templates.get((name, context))
+
+    def delete(self, name, context):
+        self.templates.pop((name, context), None)
+
+
+class StubQuery:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def filter(self, *conditions):
+        # BrandwerderTemplate.apply only asks for the site-wide templates
+        return self
+
+    def __iter__(self):
+        return iter(list(self._rows))
+
+
+class StubStore:
+    def __init__(self):
+        self.rows = {}
+
+    def query(self, model):
+        return StubQuery(self.rows.values())
+
+    def add(self, row):
+        self.rows[row.name] = row
+
+
+class StubDatabase:
+    def __init__(self):
+        self.store = StubStore()
+        self.commits = 0
+
+    def commit(self):
+        self.commits += 1
+
+    def abort(self):
+        pass
+
+
+class SyntheticList:
+    def __init__(self, list_name, mail_host=DOMAIN):
+        self.list_name = list_name
+        self.mail_host = mail_host
+        self.list_id = '{}.{}'.format(list_name, mail_host)
+        self.fqdn_listname = '{}@{}'.format(list_name, mail_host)
+        self.display_name = list_name
+        self.description = ''
+        self.info = ''
+
+
+def list_names(count):
+    # nine of ten are class lists (klasse-1a ... and klasse-a1 ...), all
+    # names are unique so the naming cache does not hide the work
+    names = []
+    for index in range(count):
+        if index % 10 == 9:
+            names.append('gremium-{}'.format(index))
+        elif index % 2:
+            names.append('klasse-{}{}'.format(index // 6 + 1, 'abcdef'[index % 6]))
+        else:
+            names.append('klasse-{}{}'.format('abcdef'[index % 6], index // 6 + 1))
+    return names
+
+
+def install_stubs():
+    from mailman.core import i18n
+    if i18n._ is None:
+        i18n.initialize()
+    site_manager = getGlobalSiteManager()
+    site_manager.registerUtility(StubStyleManager(), IStyleManager)
+    templates = StubTemplateManager()
+    site_manager.registerUtility(templates, ITemplateManager)
+    config.db = StubDatabase()
+    return templates
+
+
+def measure(function, count):
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    return {
+        'count': count,
+        'seconds': seconds,
+        'per_second': count / seconds if seconds else None,
+        'us_per_op': 1e6 * seconds / count if count else None,
+    }
+
+
+def run_scale(count):
+    from brandwerder_plugin.styles.brandwerder_names import (
+        KLASSE_RULE, klassenlist_name, resolve_list_name)
+    from brandwerder_plugin.styles.brandwerder_style import BrandwerderStyle
+    from brandwerder_plugin.templates.brandwerder_loader import (
+        TEMPLATE_PATHS, template_cache)
+    from brandwerder_plugin.templates.brandwerder_template import (
+        BrandwerderTemplate)
+
+    templates = install_stubs()
+    names = list_names(count)
+    style = BrandwerderStyle()
+    results = {}
+
+    results['names.klassenlist_name'] = measure(
+        lambda: [KLASSE_RULE.pattern.sub(klassenlist_name, name)
+                 for name in names], count)
+    resolve_list_name.cache_clear()
+    results['names.resolve_list_name'] = measure(
+        lambda: [resolve_list_name(name) for name in names], count)
+
+    mlists = [SyntheticList(name) for name in names]
+    results['style.apply'] = measure(
+        lambda: [style.apply(mlist) for mlist in mlists], count)
+    results['style.restyle'] = measure(
+        lambda: [style.restyle(mlist) for mlist in mlists], count)
+
+    bindings = [(name, mlist.list_id, uri)
+                for mlist in mlists
+                for name, uri in resolve_list_name(mlist.list_name).templates]
+    templates.templates.clear()
+    results['templates.set_template'] = measure(
+        lambda: [BrandwerderTemplate.set_template(name, context, uri)
+                 for name, context, uri in bindings], len(bindings))
+
+    # the site templates: written on the first runner start, then skipped
+    calls = min(count, 1000)
+    config.db = StubDatabase()
+    results['templates.apply.cold'] = measure(BrandwerderTemplate.apply, 1)
+    results['templates.apply.warm'] = measure(
+        lambda: [BrandwerderTemplate.apply() for _ in range(calls)], calls)
+
+    # every list renders one of the templates, like mailman's expand()
+    paths = sorted(TEMPLATE_PATHS.values())
+    template_cache.clear()
+
+    def render():
+        for index, mlist in enumerate(mlists):
+            text = template_cache.read(paths[index % len(paths)])
+            Template(text).safe_substitute(
+                listname=mlist.fqdn_listname,
+                list_id=mlist.list_id,
+                display_name=mlist.display_name,
+                short_listname=mlist.list_name,
+                domain=mlist.mail_host,
+                description=mlist.description,
+                info=mlist.info,
+                request_email='{}-request@{}'.format(
+                    mlist.list_name, mlist.mail_host),
+                owner_email='{}-owner@{}'.format(
+                    mlist.list_name, mlist.mail_host),
+                language='de',
+                site_email='postmaster@' + mlist.mail_host)
+
+    results['templates.render'] = measure(render, count)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous, current, threshold):
+    """Print the change per case, return the cases slower than threshold."""
+    regressions = []
+    for scale, cases in sorted(current['results'].items(), key=lambda i: int(i[0])):
+        for case, result in sorted(cases.items()):
+            before = previous['results'].get(scale, {}).get(case)
+            if before is None or not before['seconds']:
+                continue
+            change = result['seconds'] / before['seconds'] - 1
+            flag = ''
+            if change > threshold:
+                regressions.append((scale, case, change))
+                flag = '  <-- slower'
+            print('{:>7} {:<28} {:+7.1%}{}'.format(scale, case, change, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        '--scales', default=','.join(str(scale) for scale in SCALES),
+        help='comma separated numbers of lists (default: %(default)s)')
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='runs per scale, the fastest one is kept (default: %(default)s)')
+    parser.add_argument('--output', help='write the JSON results to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run')
+    parser.add_argument('--threshold', type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+    for scale in (int(scale) for scale in args.scales.split(',')):
+        best = {}
+        for _ in range(args.repeat):
+            for case, result in run_scale(scale).items():
+                if case not in best or result['seconds'] < best[case]['seconds']:
+                    best[case] = result
+        results[str(scale)] = best
+        for case, result in sorted(best.items()):
+            print('{:>7} {:<28} {:10.4f}s {:12.1f} us/op'.format(
+                scale, case, result['seconds'], result['us_per_op']))
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'repeat': args.repeat,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(report, fp, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+    if args.compare:
+        with open(args.compare) as fp:
+            previous = json.load(fp)
+        regressions = compare(previous, report, args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import click
+import time
+
+from contextlib import contextmanager
+from mailman.app.lifecycle import create_list
+from mailman.config import config
+from mailman.core.i18n import _
+from mailman.interfaces.command import ICLISubCommand
+from mailman.interfaces.domain import IDomainManager
+from mailman.interfaces.listmanager import IListManager
+from mailman.utilities.options import I18nCommand
+from public import public
+from zope.component import getUtility
+from zope.interface import implementer
+from ..postorius_cache import postorius_cache
+from ..styles.brandwerder_style import BrandwerderStyle
+
+
+@contextmanager
+def phase(timings, name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.append((name, time.perf_counter() - start))
+
+
+@click.command(
+    cls=I18nCommand,
+    help=_("""\
+    Legt die Klassen-Mailinglisten `klasse-KLASSE@DOMAIN` in einer einzigen
+    Transaktion an, setzt den brandwerder-style und die Klassen-Vorlagen.
+    Bereits vorhandene Listen werden übersprungen."""))
+@click.option(
+    '--domain', '-d',
+    default='lists.brandwerder.de',
+    help=_('Die Domain der Mailinglisten.'))
+@click.option(
+    '--owner', '-o', 'owners',
+    multiple=True,
+    help=_('Besitzer der Mailinglisten, kann mehrfach angegeben werden.'))
+@click.argument('klassen', nargs=-1, required=True)
+@click.pass_context
+def klassen(ctx, domain, owners, klassen):
+    if getUtility(IDomainManager).get(domain) is None:
+        ctx.fail(_('Unbekannte Domain: $domain'))
+
+    list_manager = getUtility(IListManager)
+    style = BrandwerderStyle()
+    timings = []
+    mlists = []
+
+    # Create the lists with the plain defaults, the brandwerder settings and
+    # templates are applied afterwards in one pass for all lists.
+    with postorius_cache.batch():
+        with phase(timings, 'create'):
+            for klasse in klassen:
+                fqdn_listname = 'klasse-{}@{}'.format(klasse.lower(), domain)
+                if list_manager.get(fqdn_listname) is not None:
+                    print(_('Liste existiert bereits: $fqdn_listname'))
+                    continue
+                mlists.append(create_list(fqdn_listname, list(owners), 'legacy-default'))
+
+        with phase(timings, 'style'):
+            for mlist in mlists:
+                style.apply_settings(mlist)
+
+        with phase(timings, 'templates'):
+            for mlist in mlists:
+                style.apply_templates(mlist)
+
+        with phase(timings, 'commit'):
+            config.db.commit()
+
+    count = len(mlists)
+    print(_('$count Mailinglisten angelegt'))
+    for name, seconds in timings:
+        print('  {:<10} {:8.3f}s'.format(name, seconds))
+    print('  {:<10} {:8.3f}s'.format('total', sum(s for n, s in timings)))
+
+
+@public
+@implementer(ICLISubCommand)
+class Klassen:
+    name = 'klassen'
+    command = klassen
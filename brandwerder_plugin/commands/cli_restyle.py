@@ -0,0 +1,61 @@
+import click
+
+from mailman.config import config
+from mailman.core.i18n import _
+from mailman.interfaces.command import ICLISubCommand
+from mailman.interfaces.listmanager import IListManager
+from mailman.utilities.options import I18nCommand
+from public import public
+from zope.component import getUtility
+from zope.interface import implementer
+from ..postorius_cache import postorius_cache
+from ..styles.brandwerder_style import BrandwerderStyle
+
+
+@click.command(
+    cls=I18nCommand,
+    help=_("""\
+    Gleicht die Mailinglisten mit dem brandwerder-style ab, ohne den
+    legacy-default Style erneut anzuwenden. Es werden nur die Einstellungen
+    und Vorlagen geschrieben, die sich unterscheiden. Ohne LISTEN werden alle
+    Mailinglisten abgeglichen."""))
+@click.option(
+    '--dry-run', '-n', is_flag=True, default=False,
+    help=_('Nur anzeigen, was geändert würde.'))
+@click.argument('listspecs', metavar='LISTEN', nargs=-1)
+@click.pass_context
+def restyle(ctx, dry_run, listspecs):
+    list_manager = getUtility(IListManager)
+    if listspecs:
+        mlists = []
+        for listspec in listspecs:
+            mlist = list_manager.get(listspec)
+            if mlist is None:
+                ctx.fail(_('Unbekannte Mailingliste: $listspec'))
+            mlists.append(mlist)
+    else:
+        mlists = list(list_manager.mailing_lists)
+
+    style = BrandwerderStyle()
+    restyled = 0
+    for mlist in mlists:
+        changed = style.restyle(mlist)
+        if changed:
+            restyled += 1
+            print('{}: {}'.format(mlist.list_id, ', '.join(changed)))
+
+    if dry_run:
+        config.db.abort()
+    else:
+        config.db.commit()
+        if restyled:
+            postorius_cache.invalidate()
+    count = len(mlists)
+    print(_('$restyled von $count Mailinglisten geändert'))
+
+
+@public
+@implementer(ICLISubCommand)
+class Restyle:
+    name = 'restyle'
+    command = restyle
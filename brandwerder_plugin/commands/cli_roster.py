@@ -0,0 +1,126 @@
+import click
+import csv
+import time
+
+from mailman.config import config
+from mailman.core.i18n import _
+from mailman.interfaces.address import (
+    IEmailValidator, InvalidEmailAddressError)
+from mailman.interfaces.command import ICLISubCommand
+from mailman.interfaces.listmanager import IListManager
+from mailman.interfaces.member import AlreadySubscribedError
+from mailman.interfaces.subscriptions import (
+    ISubscriptionManager, SubscriptionPendingError)
+from mailman.interfaces.usermanager import IUserManager
+from mailman.utilities.datetime import now
+from mailman.utilities.options import I18nCommand
+from public import public
+from zope.component import getUtility
+from zope.interface import implementer
+from ..postorius_cache import postorius_cache
+
+
+def read_roster(fp):
+    # (list, address, name) for every row, a header row is skipped
+    for row in csv.reader(fp):
+        if not row or row[0].startswith('#'):
+            continue
+        if row[0].strip().lower() in ('list', 'liste'):
+            continue
+        row = [field.strip() for field in row] + ['', '']
+        yield row[0], row[1], row[2]
+
+
+@click.command(
+    cls=I18nCommand,
+    help=_("""\
+    Trägt die Mitglieder aus der CSV-Datei DATEI (Liste, Adresse, Name) in
+    die Mailinglisten ein. Die Adressen gelten als bestätigt und werden ohne
+    Bestätigung und Moderation eingetragen. Mit --invite bekommt stattdessen
+    jede Adresse eine Einladung, die sie nur noch bestätigen muss."""))
+@click.option(
+    '--invite', '-i', is_flag=True, default=False,
+    help=_('Einladungen verschicken statt direkt einzutragen.'))
+@click.option(
+    '--batch-size', '-b', type=int, default=500,
+    help=_('Zeilen pro Transaktion.'))
+@click.option(
+    '--dry-run', '-n', is_flag=True, default=False,
+    help=_('Nur prüfen, nichts eintragen und keine E-Mails verschicken.'))
+@click.argument('roster', metavar='DATEI', type=click.File('r', encoding='utf-8'))
+@click.pass_context
+def roster(ctx, invite, batch_size, dry_run, roster):
+    list_manager = getUtility(IListManager)
+    user_manager = getUtility(IUserManager)
+    validator = getUtility(IEmailValidator)
+    mlists = {}
+    rows = subscribed = existing = errors = 0
+
+    def subscribe(mlist, email, name):
+        address = user_manager.get_address(email)
+        if dry_run:
+            if not validator.is_valid(email):
+                raise InvalidEmailAddressError(email)
+            if address is not None and mlist.is_subscribed(address):
+                raise AlreadySubscribedError(mlist.fqdn_listname, email, None)
+            return
+
+        if address is None:
+            address = user_manager.create_address(email, name or None)
+        if address.user is None:
+            user_manager.create_user(display_name=name or None).link(address)
+        if invite:
+            # pre_confirmed=False: only the confirmation mail is sent
+            ISubscriptionManager(mlist).register(
+                address, pre_verified=True, pre_approved=True)
+        else:
+            if address.verified_on is None:
+                address.verified_on = now()
+            mlist.subscribe(address)
+
+    start = time.perf_counter()
+    with postorius_cache.batch():
+        for listspec, email, name in read_roster(roster):
+            rows += 1
+            if listspec not in mlists:
+                mlists[listspec] = list_manager.get(listspec)
+            mlist = mlists[listspec]
+            if mlist is None:
+                errors += 1
+                print(_('Unbekannte Mailingliste: $listspec'))
+                continue
+
+            try:
+                subscribe(mlist, email, name)
+            except InvalidEmailAddressError:
+                errors += 1
+                print(_('Ungültige Adresse: $email'))
+            except (AlreadySubscribedError, SubscriptionPendingError):
+                existing += 1
+            else:
+                subscribed += 1
+
+            if not dry_run and rows % batch_size == 0:
+                config.db.commit()
+
+        if dry_run:
+            config.db.abort()
+        else:
+            config.db.commit()
+            if subscribed:
+                postorius_cache.invalidate()
+
+    seconds = time.perf_counter() - start
+    rate = rows / seconds if seconds else 0.0
+    if dry_run:
+        print(_('Probelauf, es wurde nichts eingetragen.'))
+    print(_('$rows Zeilen, $subscribed eingetragen, $existing bereits '
+            'Mitglied, $errors Fehler'))
+    print('  {:.3f}s, {:.1f} Zeilen/s'.format(seconds, rate))
+
+
+@public
+@implementer(ICLISubCommand)
+class Roster:
+    name = 'roster'
+    command = roster
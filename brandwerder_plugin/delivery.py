@@ -0,0 +1,268 @@
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from .instrumentation import histogram
+from public import public
+import logging
+import queue
+import smtplib
+import ssl
+import threading
+import time
+
+log = logging.getLogger('mailman.smtp')
+
+# Outgoing delivery with a pool of authenticated SMTP sessions.
+#
+# mailman.mta.deliver.deliver opens, secures and authenticates a connection
+# for every message and sends the recipient chunks one after another. Here the
+# sessions stay open across messages (up to `max_messages` each) and the
+# chunks of a message are sent in parallel, one session per worker. The time
+# per chunk goes into the `delivery.chunk` histogram of the instrumentation.
+#
+# Configured in mailman.cfg:
+#
+#   [mta]
+#   outgoing: brandwerder_plugin.delivery.deliver
+#
+# Personalized and VERP'd messages are passed on to mailman's own deliver().
+
+ChunkResult = namedtuple('ChunkResult', 'recipients refused seconds')
+
+
+@public
+class SMTPPool:
+    def __init__(self, host, port, user=None, password=None,
+                 secure_mode='smtp', size=4, max_messages=100, timeout=60):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.secure_mode = secure_mode
+        self.size = size
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()
+
+    def _connect(self):
+        if self.secure_mode == 'smtps':
+            session = smtplib.SMTP_SSL(
+                self.host, self.port, timeout=self.timeout,
+                context=ssl.create_default_context())
+        else:
+            session = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            if self.secure_mode == 'starttls':
+                session.starttls(context=ssl.create_default_context())
+        if self.user:
+            session.login(self.user, self.password)
+        session.brandwerder_messages = 0
+        return session
+
+    def release(self, session, broken=False):
+        session.brandwerder_messages += 1
+        if (broken or session.brandwerder_messages >= self.max_messages
+                or self._idle.qsize() >= self.size):
+            self._quit(session)
+        else:
+            self._idle.put(session)
+
+    @staticmethod
+    def _quit(session):
+        try:
+            session.quit()
+        except smtplib.SMTPException:
+            session.close()
+        except OSError:
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self._quit(self._idle.get_nowait())
+            except queue.Empty:
+                break
+
+    @staticmethod
+    def _send(session, sender, recipients, message):
+        # (session broken, refused recipients)
+        try:
+            return False, session.sendmail(sender, recipients, message)
+        except smtplib.SMTPRecipientsRefused as error:
+            return False, error.recipients
+        except smtplib.SMTPResponseException as error:
+            # a refused MAIL or DATA refuses every recipient with its code,
+            # smtplib has reset the session unless the server is closing it
+            log.error('smtp response exception: %s', error)
+            return error.smtp_code == 421, {
+                recipient: (error.smtp_code, error.smtp_error)
+                for recipient in recipients}
+
+    def sendmail(self, sender, recipients, message):
+        """Send with a pooled session, returns the refused recipients.
+
+        Like mailman.mta.base, connection problems refuse every recipient
+        with 444, a temporary failure.
+        """
+        try:
+            session = self._idle.get_nowait()
+        except queue.Empty:
+            session = None
+        try:
+            if session is not None:
+                try:
+                    broken, refused = self._send(
+                        session, sender, recipients, message)
+                except smtplib.SMTPServerDisconnected:
+                    # the server closed the idle session, try a new one
+                    self._quit(session)
+                    session = None
+            if session is None:
+                session = self._connect()
+                broken, refused = self._send(
+                    session, sender, recipients, message)
+        except (OSError, smtplib.SMTPException) as error:
+            log.error('low level smtp error: %s', error)
+            if session is not None:
+                self._quit(session)
+            return {recipient: (444, str(error)) for recipient in recipients}
+        self.release(session, broken)
+        return refused
+
+
+@public
+class PooledDelivery:
+    def __init__(self, pool, chunk_size=500):
+        self.pool = pool
+        self.chunk_size = chunk_size
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool.size, thread_name_prefix='brandwerder-smtp')
+
+    def _send_chunk(self, sender, chunk, message):
+        start = time.perf_counter()
+        refused = self.pool.sendmail(sender, chunk, message)
+        seconds = time.perf_counter() - start
+        with self._lock:
+            histogram('delivery.chunk').observe(seconds)
+        return ChunkResult(chunk, refused, seconds)
+
+    def send(self, sender, recipients, message):
+        """Send to all recipients, returns a `ChunkResult` per chunk."""
+        recipients = list(recipients)
+        futures = [
+            self._executor.submit(
+                self._send_chunk, sender,
+                recipients[start:start + self.chunk_size], message)
+            for start in range(0, len(recipients), self.chunk_size)]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self._executor.shutdown()
+        self.pool.close()
+
+
+_delivery = None
+_delivery_lock = threading.Lock()
+
+
+def get_delivery():
+    global _delivery
+    with _delivery_lock:
+        if _delivery is None:
+            from mailman.config import config
+            port = int(config.mta.smtp_port)
+            secure_mode = getattr(config.mta, 'smtp_secure_mode', None) or (
+                'starttls' if port == 587 else 'smtp')
+            pool = SMTPPool(
+                config.mta.smtp_host, port,
+                config.mta.smtp_user or None, config.mta.smtp_pass,
+                secure_mode=secure_mode,
+                size=4,
+                max_messages=int(config.mta.max_sessions_per_connection) or 100)
+            _delivery = PooledDelivery(
+                pool, int(config.mta.max_recipients) or 500)
+        return _delivery
+
+
+def split_failures(refused):
+    # (temporary, permanent) like mailman.mta.deliver, 552 is "too many
+    # recipients" (RFC 5321, 4.5.3.1.10) and temporary
+    temporary = []
+    permanent = []
+    for recipient, (code, smtp_message) in refused.items():
+        if code >= 500 and code != 552:
+            permanent.append(recipient)
+        else:
+            temporary.append(recipient)
+    return temporary, permanent
+
+
+@public
+def deliver(mlist, msg, msgdata):
+    """Outgoing delivery function, see `[mta] outgoing` in mailman.cfg."""
+    from mailman.config import config
+    from mailman.interfaces.mailinglist import Personalization
+    from mailman.interfaces.mta import SomeRecipientsFailed
+    from mailman.mta import deliver as mailman_deliver
+    from mailman.utilities.string import expand
+
+    if (msgdata.get('verp') or
+            mlist.personalize != Personalization.none):
+        return mailman_deliver.deliver(mlist, msg, msgdata)
+
+    recipients = msgdata.get('recipients')
+    if not recipients:
+        return
+
+    # decorated and ARC signed like in mailman's BulkDelivery, class lists
+    # already got the cached header and footer (nodecorate), arc-sign is new
+    # in Mailman 3.3
+    config.handlers['decorate'].process(mlist, msg, msgdata)
+    msgdata['nodecorate'] = True
+    if 'arc-sign' in config.handlers and not msgdata.get('arc_signed'):
+        config.handlers['arc-sign'].process(mlist, msg, msgdata)
+        msgdata['arc_signed'] = True
+
+    sender = msgdata.get('sender', mlist.bounces_address)
+    start = time.perf_counter()
+    chunks = get_delivery().send(sender, recipients, msg.as_bytes())
+    seconds = time.perf_counter() - start
+
+    # logged through the [logging.smtp] templates, like mailman's deliver()
+    size = getattr(msg, 'original_size', msgdata.get('original_size'))
+    if size is None:
+        size = len(msg.as_string())
+    substitutions = dict(
+        msgid=msg.get('message-id', 'n/a'),
+        listname=mlist.fqdn_listname,
+        sender=msgdata.get('original-sender', msg.sender),
+        size=size,
+        smtpcode='n/a',
+        smtpmsg='n/a',
+    )
+    templates = config.logging.smtp
+
+    def log_template(template, **extras):
+        if template.lower() != 'no':
+            log.info('%s', expand(template, mlist, dict(substitutions, **extras)))
+
+    refused = {}
+    for chunk in chunks:
+        log_template(templates.every, recip=len(chunk.recipients),
+                     time=chunk.seconds, refused=len(chunk.refused))
+        refused.update(chunk.refused)
+    log.debug('%s: %d chunks to %d recipients in %.3fs',
+              substitutions['msgid'], len(chunks), len(recipients), seconds)
+
+    if refused:
+        log_template(templates.refused, recip=len(recipients),
+                     time=seconds, refused=len(refused))
+    else:
+        log_template(templates.success, recip=len(recipients),
+                     time=seconds, refused=0)
+    for recipient, (code, smtp_message) in refused.items():
+        log_template(templates.failure, recip=recipient, time=seconds,
+                     refused=len(refused), smtpcode=code, smtpmsg=smtp_message)
+
+    temporary, permanent = split_failures(refused)
+    if temporary or permanent:
+        raise SomeRecipientsFailed(temporary, permanent)
@@ -0,0 +1,154 @@
+import copy
+
+from collections import namedtuple
+from email.mime.text import MIMEText
+from email.message import Message
+from mailman.core.i18n import _
+from mailman.interfaces.handler import IHandler
+from mailman.interfaces.template import ITemplateLoader
+from mailman.utilities.string import expand
+from public import public
+from zope.component import getUtility
+from zope.interface import implementer
+
+
+Footer = namedtuple('Footer', 'key text part')
+
+HEADER = 'list:member:regular:header'
+FOOTER = 'list:member:regular:footer'
+
+
+@public
+class FooterCache:
+    """The rendered header and footer MIME parts of every list.
+
+    The styles and templates are changed by other processes (REST, shell), so
+    an entry is keyed on the template text and the list settings used in the
+    template and rendered again as soon as one of them differs.
+    """
+
+    def __init__(self):
+        self._footers = {}
+
+    @staticmethod
+    def _key(mlist, template):
+        return (template, mlist.display_name, mlist.fqdn_listname,
+                mlist.owner_address, mlist.description, mlist.info)
+
+    @staticmethod
+    def render(mlist, template):
+        footer = expand(template, mlist, dict(
+            display_name=mlist.display_name,
+            listname=mlist.fqdn_listname,
+            list_id=mlist.list_id,
+            owner_email=mlist.owner_address,
+            request_email=mlist.request_address,
+            description=mlist.description,
+            info=mlist.info,
+            ))
+        part = MIMEText(footer, _charset='utf-8')
+        part['Content-Disposition'] = 'inline'
+        # encode once, every message only gets a copy of the finished part
+        part.as_bytes()
+        return footer, part
+
+    def get(self, mlist, name=FOOTER):
+        # the template loader keeps the template files in memory
+        template = getUtility(ITemplateLoader).get(name, mlist)
+        key = self._key(mlist, template)
+        footer = self._footers.get((mlist.list_id, name))
+        if footer is None or footer.key != key:
+            footer = Footer(key, *self.render(mlist, template))
+            self._footers[mlist.list_id, name] = footer
+        return footer
+
+    def clear(self):
+        self._footers.clear()
+
+
+footer_cache = FooterCache()
+
+
+def append_inline(msg, footer, charset, header=''):
+    # add the header and footer to a text/plain body like mailman's decorate
+    # handler, returns False if the body can not be decoded or re-encoded
+    format_param = msg.get_param('format')
+    delsp = msg.get_param('delsp')
+    try:
+        payload = msg.get_payload(decode=True).decode(
+            msg.get_content_charset() or 'us-ascii')
+    except (LookupError, UnicodeError):
+        return False
+    if header and not header.endswith('\n'):
+        header += '\n'
+    if footer and not payload.endswith('\n'):
+        payload += '\n'
+    payload = header + payload + footer
+
+    cte = msg.get('content-transfer-encoding')
+    del msg['content-transfer-encoding']
+    for cset in (charset, msg.get_content_charset() or 'us-ascii', 'utf-8'):
+        try:
+            msg.set_payload(payload.encode(cset), cset)
+        except (LookupError, UnicodeError):
+            continue
+        if format_param:
+            msg.set_param('format', format_param)
+        if delsp:
+            msg.set_param('delsp', delsp)
+        return True
+
+    if cte:
+        msg['Content-Transfer-Encoding'] = cte
+    return False
+
+
+def attach(msg, footer, charset, header=None):
+    header_text = header.text if header is not None else ''
+    if not header_text and not footer.text:
+        return
+
+    if msg.get_content_type() == 'text/plain' and not msg.is_multipart():
+        if append_inline(msg, footer.text, charset, header_text):
+            return
+
+    # the parts are copied, every message gets its own
+    before = [copy.deepcopy(header.part)] if header_text else []
+    after = [copy.deepcopy(footer.part)] if footer.text else []
+    if msg.get_content_type() == 'multipart/mixed':
+        payload = msg.get_payload()
+        if not isinstance(payload, list):
+            payload = [payload]
+        msg.set_payload(before + payload + after)
+        return
+
+    # wrap the body into a multipart/mixed message, the same way mailman's
+    # decorate handler does
+    inner = Message()
+    for name, value in msg.items():
+        if name.lower().startswith('content-'):
+            inner[name] = value
+    inner.set_payload(msg.get_payload())
+    for name in set(msg.keys()):
+        if name.lower().startswith('content-'):
+            del msg[name]
+    msg.set_payload(before + [inner] + after)
+    msg.set_type('multipart/mixed')
+
+
+@public
+@implementer(IHandler)
+class BrandwerderFooter:
+    name = 'brandwerder-footer'
+    description = _(
+        'Fügt die vorgerenderte Kopf- und Fußzeile der Liste hinzu.')
+
+    def process(self, mlist, msg, msgdata):
+        if msgdata.get('isdigest') or msgdata.get('nodecorate'):
+            return
+
+        attach(msg, footer_cache.get(mlist, FOOTER),
+               mlist.preferred_language.charset,
+               header=footer_cache.get(mlist, HEADER))
+        # header and footer are already there, mailman must not decorate again
+        msgdata['nodecorate'] = True
@@ -1,24 +1,31 @@
-import os
-
 from mailman.interfaces.plugin import IPlugin
 from public import public
 from zope.interface import implementer
+from .instrumentation import timed
+from .postorius_cache import postorius_cache
+from .templates.brandwerder_loader import BrandwerderTemplateLoader
 from .templates.brandwerder_template import BrandwerderTemplate
+import logging
+
 
 @public
 @implementer(IPlugin)
 class BrandwerderPlugin:
+    @timed('hook.pre_hook', profile=True, level=logging.INFO)
     def pre_hook(self):
-        # print("pre_hook called")
         pass
 
+    @timed('hook.post_hook', profile=True, level=logging.INFO)
     def post_hook(self):
-        # print("post_hook called")
         BrandwerderTemplate.apply()
+        BrandwerderTemplateLoader.install()
+        postorius_cache.subscribe()
 
     @property
     def resource(self):
-        return None
+        # only the REST runner asks for it, the others do not need falcon
+        from .resource import BrandwerderResource
+        return BrandwerderResource()
 
 # mailman 3.1 pre hook
 def pre_hook():
@@ -0,0 +1,100 @@
+from contextlib import contextmanager
+from functools import wraps
+from public import public
+import atexit
+import cProfile
+import logging
+import os
+import time
+
+log = logging.getLogger('mailman.plugins')
+
+# Timing histograms of the plugin hooks, style application and template
+# registration. Every hook run is logged, the histograms are logged when the
+# process exits (e.g. a runner is stopped).
+#
+# Set BRANDWERDER_PROFILE_DIR to dump a cProfile file for every profiled call
+# (the hooks) into that directory, load it with `python -m pstats <file>`.
+
+BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+
+@public
+class Histogram:
+    def __init__(self, name):
+        self.name = name
+        self.buckets = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for index, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.buckets[index] += 1
+                break
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def __str__(self):
+        buckets = ' '.join(
+            '<={}s:{}'.format(bound, count)
+            for bound, count in zip(BUCKETS, self.buckets) if count)
+        return '{}: {} calls, {:.4f}s total, {:.4f}s max [{}]'.format(
+            self.name, self.count, self.total, self.max, buckets)
+
+
+histograms = {}
+
+
+@public
+def histogram(name):
+    if name not in histograms:
+        histograms[name] = Histogram(name)
+    return histograms[name]
+
+
+@public
+@contextmanager
+def timer(name, profile=False, level=logging.DEBUG):
+    profile_dir = os.environ.get('BRANDWERDER_PROFILE_DIR') if profile else None
+    profiler = None
+    if profile_dir:
+        profiler = cProfile.Profile()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        seconds = time.perf_counter() - start
+        histogram(name).observe(seconds)
+        log.log(level, 'brandwerder %s: %.4fs', name, seconds)
+        if profiler is not None:
+            path = os.path.join(profile_dir, '{}-{}-{}.prof'.format(
+                name, os.getpid(), histogram(name).count))
+            profiler.dump_stats(path)
+            log.info('brandwerder %s: profile written to %s', name, path)
+
+
+@public
+def timed(name, profile=False, level=logging.DEBUG):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with timer(name, profile, level):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@public
+def report():
+    for name in sorted(histograms):
+        log.info('brandwerder timings %s', histograms[name])
+
+
+atexit.register(report)
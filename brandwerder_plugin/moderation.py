@@ -0,0 +1,82 @@
+from mailman.app.moderator import send_rejection
+from mailman.core.i18n import _
+from mailman.interfaces.member import AlreadySubscribedError
+from mailman.interfaces.pending import IPendings
+from mailman.interfaces.subscriptions import ISubscriptionManager
+from public import public
+from zope.component import getUtility
+from .instrumentation import timed
+import logging
+
+log = logging.getLogger('mailman.plugins')
+
+# Bulk moderation of held subscription requests.
+#
+# With confirm_then_moderate every parent's subscription ends up as a request
+# for the list moderators. moderate() handles any number of them in the
+# current transaction (the REST API commits once per request). The welcome
+# messages of accepted members are queued by Mailman as usual.
+
+ACTIONS = ('accept', 'reject', 'discard')
+
+
+@public
+def held_subscriptions(mlist):
+    # (token, pendable) of the requests waiting for a moderator, requests
+    # still waiting for the subscriber's confirmation are left out
+    return [
+        (token, pendable)
+        for token, pendable in getUtility(IPendings).find(
+            mlist=mlist, pend_type='subscription')
+        if pendable is not None and pendable.get('token_owner') == 'moderator'
+    ]
+
+
+@public
+@timed('moderation.moderate')
+def moderate(mlist, action, tokens=None, reason=None):
+    """Accept, reject or discard held subscription requests.
+
+    tokens=None moderates all held requests of the list. Returns a dict with
+    the handled tokens, the failed tokens with the reason and the addresses
+    of the accepted members.
+    """
+    assert action in ACTIONS, action
+    pendings = getUtility(IPendings)
+    manager = ISubscriptionManager(mlist)
+    if tokens is None:
+        tokens = [token for token, pendable in held_subscriptions(mlist)]
+
+    done = []
+    failed = {}
+    accepted = []
+    for token in tokens:
+        pendable = pendings.confirm(token, expunge=False)
+        if pendable is None or pendable.get('list_id') != mlist.list_id:
+            failed[token] = 'not found'
+            continue
+
+        if action == 'accept':
+            try:
+                member = manager.confirm(token)[2]
+            except LookupError:
+                failed[token] = 'not found'
+                continue
+            except AlreadySubscribedError:
+                manager.discard(token)
+                failed[token] = 'already subscribed'
+                continue
+            if member is not None:
+                accepted.append(member.address.email)
+        else:
+            manager.discard(token)
+            if action == 'reject':
+                send_rejection(
+                    mlist, _('Subscription request'), pendable['email'],
+                    reason or _('[No reason given]'))
+        done.append(token)
+
+    log.info('%s: %s %d held subscriptions, %d failed',
+             mlist.list_id, action, len(done), len(failed))
+    return dict(done=done, failed=failed, accepted=accepted)
+
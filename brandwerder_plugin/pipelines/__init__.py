@@ -0,0 +1 @@
+# print(__file__ + " called")
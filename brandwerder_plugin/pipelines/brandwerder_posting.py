@@ -0,0 +1,16 @@
+from mailman.core.i18n import _
+from mailman.pipelines.builtin import PostingPipeline
+from public import public
+
+
+@public
+class BrandwerderPostingPipeline(PostingPipeline):
+    name = 'brandwerder-posting-pipeline'
+    description = _('Pipeline der Klassen-Mailinglisten mit vorgerenderter Fußzeile.')
+
+    # the footer is added right before the message is handed to the outgoing
+    # queue, i.e. after archiving and digesting
+    _default_handlers = PostingPipeline._default_handlers[:-1] + (
+        'brandwerder-footer',
+        'to-outgoing',
+    )
@@ -0,0 +1,105 @@
+from contextlib import contextmanager
+from mailman.config import config
+from mailman.config.config import external_configuration
+from mailman.model.mailinglist import MailingList
+from public import public
+from sqlalchemy.event import listen
+from urllib.request import Request, urlopen
+import logging
+import threading
+
+log = logging.getLogger('mailman.plugins')
+
+# Postorius caches the list index and list details it reads from the REST
+# API for a few seconds (brandwerder_suite.rest_cache), this tells it to drop
+# the cached entries when lists are created, changed or deleted on the Mailman
+# side.
+# The url is `invalidate_url` in the [postorius] section of the plugin's
+# configuration file (brandwerder.cfg).
+INVALIDATE_URL = 'http://localhost:8000/brandwerder/rest-cache/invalidate/'
+
+
+def invalidate_url():
+    section = dict(config.plugin_configs).get('brandwerder_plugin')
+    if section is None or not section.configuration:
+        return INVALIDATE_URL
+    return external_configuration(section.configuration).get(
+        'postorius', 'invalidate_url', fallback=INVALIDATE_URL)
+
+
+@public
+class PostoriusCache:
+    def __init__(self, url=None):
+        self._url = url
+        self._batches = 0
+        self._pending = False
+        self._changed = False
+        self._subscribed = False
+
+    @property
+    def url(self):
+        if self._url is None:
+            self._url = invalidate_url()
+        return self._url
+
+    def invalidate(self):
+        if self._batches:
+            self._pending = True
+            return
+
+        try:
+            urlopen(Request(self.url, data=b'', method='POST'), timeout=2).close()
+        except OSError as error:
+            log.warning('postorius cache not invalidated: %s', error)
+
+    @contextmanager
+    def batch(self):
+        # collect the invalidations of a bulk operation into a single request
+        self._batches += 1
+        try:
+            yield
+        finally:
+            self._batches -= 1
+            if not self._batches and self._pending:
+                self._pending = False
+                self.invalidate()
+
+    def _before_flush(self, session, flush_context, instances):
+        # Mailman has no events for changed list settings, look at the lists
+        # written in this transaction instead. Postorius must not read them
+        # before the commit.
+        if self._changed:
+            return
+        for mlist in session.new | session.deleted:
+            if isinstance(mlist, MailingList):
+                self._changed = True
+                return
+        for mlist in session.dirty:
+            if isinstance(mlist, MailingList) and session.is_modified(mlist):
+                self._changed = True
+                return
+
+    def _after_commit(self, session):
+        if not self._changed:
+            return
+        self._changed = False
+        if self._batches:
+            self._pending = True
+            return
+        # not in the REST request, the thread is joined when the process exits
+        threading.Thread(
+            target=self.invalidate, name='postorius-cache').start()
+
+    def _after_rollback(self, session, previous_transaction):
+        self._changed = False
+
+    def subscribe(self):
+        if not self._subscribed:
+            self._subscribed = True
+            listen(config.db.store, 'before_flush', self._before_flush)
+            listen(config.db.store, 'after_commit', self._after_commit)
+            listen(
+                config.db.store, 'after_soft_rollback', self._after_rollback)
+
+
+postorius_cache = PostoriusCache()
@@ -0,0 +1,63 @@
+from mailman.interfaces.listmanager import IListManager
+from mailman.rest.helpers import NotFound, bad_request, child, etag, okay
+from mailman.rest.validator import Validator, list_of_strings_validator
+from public import public
+from zope.component import getUtility
+from .moderation import ACTIONS, held_subscriptions, moderate
+
+# REST resource of the plugin, below /<api>/plugins/brandwerder_plugin/:
+#
+#   lists/<list_id>/requests  GET: the held subscription requests
+#                             POST: action=accept|reject|discard, token=...
+#                             (repeated, none for all), reason
+
+
+def action_validator(value):
+    if value not in ACTIONS:
+        raise ValueError('Unknown action: {}'.format(value))
+    return value
+
+
+class HeldSubscriptions:
+    def __init__(self, mlist):
+        self._mlist = mlist
+
+    def on_get(self, request, response):
+        entries = [
+            dict(token=token,
+                 email=pendable['email'],
+                 display_name=pendable.get('display_name', ''),
+                 when=pendable.get('when'))
+            for token, pendable in held_subscriptions(self._mlist)
+        ]
+        okay(response, etag(dict(entries=entries, total_size=len(entries))))
+
+    def on_post(self, request, response):
+        try:
+            arguments = Validator(
+                action=action_validator,
+                token=list_of_strings_validator,
+                reason=str,
+                _optional=('token', 'reason'))(request)
+        except ValueError as error:
+            bad_request(response, str(error))
+            return
+        result = moderate(
+            self._mlist, arguments['action'], arguments.get('token'),
+            arguments.get('reason'))
+        okay(response, etag(result))
+
+
+@public
+class BrandwerderResource:
+    @child()
+    def lists(self, context, segments):
+        if len(segments) != 2:
+            return NotFound(), []
+        list_id, name = segments
+        mlist = getUtility(IListManager).get_by_list_id(list_id)
+        if mlist is None:
+            return NotFound(), []
+        if name == 'requests':
+            return HeldSubscriptions(mlist), []
+        return NotFound(), []
@@ -0,0 +1,199 @@
+import asyncio
+import base64
+import ssl
+import time
+
+from urllib.parse import urlencode, urlsplit
+from public import public
+
+# Asynchronous bulk client for the Mailman REST API.
+#
+# Binds templates (e.g. welcome-klasse/goodbye-klasse) for many lists through
+# `PATCH /<api>/lists/<list_id>/uris`. Requests are pipelined over a small
+# pool of keep-alive connections, one connection per worker, so at most
+# `concurrency` requests are in flight.
+
+
+@public
+class RESTError(Exception):
+    def __init__(self, status, reason, body=b''):
+        super().__init__('{} {}'.format(status, reason))
+        self.status = status
+        self.reason = reason
+        self.body = body
+
+
+@public
+class BulkResult:
+    def __init__(self):
+        self.done = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    @property
+    def throughput(self):
+        return self.done / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return '{} requests, {} errors in {:.3f}s ({:.1f} requests/s)'.format(
+            self.done, len(self.errors), self.seconds, self.throughput)
+
+
+class Connection:
+    """A single keep-alive HTTP/1.1 connection."""
+
+    def __init__(self, host, port, headers, ssl=None):
+        self._host = host
+        self._port = port
+        self._headers = headers
+        self._ssl = ssl
+        self._reader = None
+        self._writer = None
+
+    async def _connect(self):
+        # True if an open connection is reused
+        if self._writer is None or self._writer.is_closing():
+            self._reader, self._writer = await asyncio.open_connection(
+                self._host, self._port, ssl=self._ssl)
+            return False
+        return True
+
+    async def close(self):
+        if self._writer is not None:
+            writer, self._writer = self._writer, None
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def request(self, method, path, fields):
+        body = urlencode(fields).encode('utf-8')
+        head = ['{} {} HTTP/1.1'.format(method, path)]
+        head += ['{}: {}'.format(*header) for header in self._headers.items()]
+        head += ['Content-Length: {}'.format(len(body)), '', '']
+
+        request = '\r\n'.join(head).encode('latin-1') + body
+
+        reused = await self._connect()
+        try:
+            return await self._send(request)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            if not reused:
+                raise
+        # the server closed the kept-alive connection in the meantime, the
+        # request is sent once more on a fresh one
+        await self.close()
+        await self._connect()
+        return await self._send(request)
+
+    async def _send(self, request):
+        self._writer.write(request)
+        await self._writer.drain()
+        return await self._response()
+
+    async def _response(self):
+        status_line = await self._reader.readline()
+        if not status_line:
+            await self.close()
+            raise ConnectionError('connection closed by server')
+        # the reason phrase may be missing (`HTTP/1.1 204`)
+        fields = status_line.decode('latin-1').rstrip().split(' ', 2)
+        status = fields[1]
+        reason = fields[2] if len(fields) > 2 else ''
+
+        headers = {}
+        while True:
+            line = await self._reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await self._reader.readline()).split(b';')[0], 16)
+                chunk = await self._reader.readexactly(size + 2)
+                if size == 0:
+                    break
+                body += chunk[:-2]
+        else:
+            body = await self._reader.readexactly(
+                int(headers.get('content-length', 0)))
+
+        if headers.get('connection', '').lower() == 'close':
+            await self.close()
+        if not 200 <= int(status) < 300:
+            raise RESTError(int(status), reason, body)
+        return int(status), body
+
+
+@public
+class BulkTemplateClient:
+    def __init__(self, base_url, user, password, api_version='3.1',
+                 concurrency=8):
+        url = urlsplit(base_url)
+        self._host = url.hostname
+        if url.scheme == 'https':
+            self._port = url.port or 443
+            self._ssl = ssl.create_default_context()
+        else:
+            self._port = url.port or 80
+            self._ssl = None
+        self._prefix = url.path.rstrip('/') + '/' + api_version
+        credentials = base64.b64encode(
+            '{}:{}'.format(user, password).encode('utf-8')).decode('ascii')
+        self._headers = {
+            'Host': url.netloc,
+            'Authorization': 'Basic ' + credentials,
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Connection': 'keep-alive',
+        }
+        self.concurrency = concurrency
+
+    async def _worker(self, queue, result):
+        connection = Connection(
+            self._host, self._port, self._headers, self._ssl)
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                list_id, templates = item
+                path = '{}/lists/{}/uris'.format(self._prefix, list_id)
+                try:
+                    await connection.request('PATCH', path, templates)
+                    result.done += 1
+                except (RESTError, OSError, asyncio.IncompleteReadError) as error:
+                    result.errors.append((list_id, error))
+                    await connection.close()
+        finally:
+            await connection.close()
+
+    async def bind_async(self, bindings):
+        # bindings: iterable of (list_id, {template name: uri})
+        result = BulkResult()
+        queue = asyncio.Queue()
+        for binding in bindings:
+            queue.put_nowait(binding)
+        for _ in range(self.concurrency):
+            queue.put_nowait(None)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            self._worker(queue, result) for _ in range(self.concurrency)))
+        result.seconds = time.perf_counter() - start
+        return result
+
+    def bind(self, bindings):
+        return asyncio.run(self.bind_async(bindings))
+
+
+@public
+def klasse_bindings(list_ids, welcome_uri, goodbye_uri):
+    templates = {
+        'list:user:notice:welcome': welcome_uri,
+        'list:user:notice:goodbye': goodbye_uri,
+    }
+    return [(list_id, templates) for list_id in list_ids]
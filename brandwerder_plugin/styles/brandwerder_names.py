@@ -0,0 +1,51 @@
+from collections import namedtuple
+from functools import lru_cache
+from public import public
+import re
+
+# Naming rules of the brandwerder lists.
+#
+# Every rule has a compiled pattern and a function building the display name
+# from the pattern match, and a selector for the lists that get the rule's
+# templates (name, file in templates/de) bound.
+
+NameRule = namedtuple('NameRule', 'pattern display_name selector templates')
+ListNaming = namedtuple('ListNaming', 'display_name klasse templates')
+
+
+@public
+def klassenlist_name(match):
+    # input: klasse-(a3) or klasse-6a
+    klasse = match.group(1).lower()
+    # If klasse = a3 return A3
+    # If klasse = 6a return 6a
+    if klasse[0].isalpha():
+        klasse = klasse[0].upper() + klasse[1:]
+    return 'Klasse ' + klasse
+
+
+KLASSE_RULE = NameRule(re.compile(r'klasse-(.*)'), klassenlist_name, re.compile('klasse'), (
+    ('list:user:notice:welcome', 'list:user:notice:welcome-klasse.txt'),
+    ('list:user:notice:goodbye', 'list:user:notice:goodbye-klasse.txt'),
+))
+
+NAME_RULES = (KLASSE_RULE,)
+
+
+@public
+@lru_cache(maxsize=4096)
+def resolve_list_name(list_name):
+    display_name = list_name
+    templates = ()
+    for rule in NAME_RULES:
+        display_name = rule.pattern.sub(rule.display_name, display_name)
+        if rule.selector.match(list_name):
+            templates += rule.templates
+    klasse = KLASSE_RULE.selector.match(list_name) is not None
+    return ListNaming(display_name, klasse, templates)
+
+
+@public
+def resolve_list_names(list_names):
+    # list name -> ListNaming for many (proposed) list names in one pass
+    return {list_name: resolve_list_name(list_name) for list_name in list_names}
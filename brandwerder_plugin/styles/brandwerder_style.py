@@ -2,13 +2,13 @@ from zope.component import getUtility
 from zope.interface import implementer
 from mailman.core.i18n import _
 from mailman.interfaces.archiver import ArchivePolicy
-from mailman.interfaces.styles import IStyle, IStyleManager
 from mailman.interfaces.mailinglist import SubscriptionPolicy
+from mailman.interfaces.styles import IStyle, IStyleManager
+from ..instrumentation import timed
 from ..templates.brandwerder_template import BrandwerderTemplate
+from .brandwerder_names import klassenlist_name, resolve_list_name
 from public import public
-import re
 
-# print(__file__ + " called")
 
 @public
 @implementer(IStyle)
@@ -16,16 +16,9 @@ class BrandwerderStyle:
     name = 'brandwerder-style'
     description = 'Setzt Standard Einstellungen, wie den Namen, der Sprache, den Listen Tag [Klasse Xxx], für `klasse-xxx`@lists.brandwerder.de Mailinglisten'
 
-    @staticmethod
-    def klassenlist_name(match):
-        # input: klasse-(a3) or klasse-6a
-        klasse = match.group(1).lower()
-        # If klasse = a3 return A3
-        # If klasse = 6a return 6a
-        if klasse[0].isalpha():
-            klasse = klasse[0].upper() + klasse[1:]
-        return 'Klasse ' + klasse
+    klassenlist_name = staticmethod(klassenlist_name)
 
+    @timed('style.apply')
     def apply(self, mailing_list):
         mlist = mailing_list
 
@@ -33,30 +26,76 @@ class BrandwerderStyle:
         manager = getUtility(IStyleManager)
         manager.get('legacy-default').apply(mlist)
 
-        ## List Identity
+        self.apply_settings(mlist)
 
-        mlist.display_name = re.sub(r'klasse-(.*)', BrandwerderStyle.klassenlist_name, mlist.list_name)
-        mlist.preferred_language = 'de'
-        mlist.subject_prefix = _('[$mlist.display_name] ')
+        # IMPORTANT: add the template after setting the style, otherwise the
+        # changes will not apply?
+        self.apply_templates(mlist)
 
-        # Description
-        mlist.description = _('Die Mailingliste der $mlist.display_name')
+    def settings(self, mailing_list):
+        # the brandwerder specific settings on top of `legacy-default`
+        mlist = mailing_list
+        naming = resolve_list_name(mlist.list_name)
+        display_name = naming.display_name
 
-        # Information
-        mlist.info = _("""Die Mailingliste der $mlist.display_name""")
+        settings = dict(
+            ## List Identity
+            display_name=display_name,
+            preferred_language='de',
+            subject_prefix=_('[$display_name] '),
 
-        # Show list on index page
-        mlist.advertised = False
+            # Description
+            description=_('Die Mailingliste der $display_name'),
 
-        ## Archiving
-        mlist.archive_policy = ArchivePolicy.never
+            # Information
+            info=_("""Die Mailingliste der $display_name"""),
 
-        ## Subscription Policy
-        mlist.subscription_policy = SubscriptionPolicy.confirm_then_moderate
+            # Show list on index page
+            advertised=False,
 
-        # IMPORTANT: add the template after setting the style, otherwise the
-        # changes will not apply?
-        if re.match('klasse', mlist.list_name):
-            # print('add template: ' + mlist.list_id)
-            BrandwerderTemplate.set_template('list:user:notice:welcome', mlist.list_id, 'list:user:notice:welcome-klasse.txt')
-            BrandwerderTemplate.set_template('list:user:notice:goodbye', mlist.list_id, 'list:user:notice:goodbye-klasse.txt')
+            ## Archiving
+            archive_policy=ArchivePolicy.never,
+
+            ## Subscription Policy
+            subscription_policy=SubscriptionPolicy.confirm_then_moderate,
+        )
+
+        ## Pipeline
+        # class lists get the footer from the pre-rendered footer cache
+        if naming.klasse:
+            settings['posting_pipeline'] = 'brandwerder-posting-pipeline'
+
+        return settings
+
+    def apply_settings(self, mailing_list):
+        mlist = mailing_list
+
+        for attribute, value in self.settings(mlist).items():
+            setattr(mlist, attribute, value)
+
+    @timed('style.restyle')
+    def restyle(self, mailing_list):
+        # Only write the settings and templates that differ from the style,
+        # e.g. after a policy change. Returns the names of the changed
+        # attributes and templates.
+        mlist = mailing_list
+        changed = []
+
+        for attribute, value in self.settings(mlist).items():
+            current = getattr(mlist, attribute)
+            # preferred_language is set by code but read as language object
+            if getattr(current, 'code', current) != value:
+                setattr(mlist, attribute, value)
+                changed.append(attribute)
+
+        for name, uri in resolve_list_name(mlist.list_name).templates:
+            if BrandwerderTemplate.update_template(name, mlist.list_id, uri):
+                changed.append(name)
+
+        return changed
+
+    def apply_templates(self, mailing_list):
+        mlist = mailing_list
+
+        for name, uri in resolve_list_name(mlist.list_name).templates:
+            BrandwerderTemplate.set_template(name, mlist.list_id, uri)
@@ -0,0 +1,101 @@
+from collections import namedtuple
+from mailman.interfaces.domain import IDomain
+from mailman.interfaces.mailinglist import IMailingList
+from mailman.interfaces.template import ITemplateLoader, ITemplateManager
+from zope.component import getGlobalSiteManager, getUtility
+from zope.interface import implementer
+from .brandwerder_template import TEMPLATE_URIS
+import hashlib
+import os
+from public import public
+
+# file uri -> path of the german templates
+TEMPLATE_PATHS = {uri: uri[len('file://'):] for uri in TEMPLATE_URIS.values()}
+
+CacheEntry = namedtuple('CacheEntry', 'stat digest text')
+
+
+@public
+class TemplateCache:
+    """In-process cache of template files.
+
+    An entry is reused as long as inode, mtime and size of the file did not
+    change, so an edited template is picked up without restarting the runners.
+    """
+
+    def __init__(self):
+        self._entries = {}
+
+    @staticmethod
+    def _stat(path):
+        stat = os.stat(path)
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+
+    def entry(self, path):
+        stat = self._stat(path)
+        entry = self._entries.get(path)
+        if entry is not None and entry.stat == stat:
+            return entry
+
+        with open(path, 'rb') as fp:
+            data = fp.read()
+        entry = CacheEntry(stat, hashlib.sha1(data).hexdigest(),
+                           data.decode('utf-8'))
+        self._entries[path] = entry
+        return entry
+
+    def read(self, path):
+        return self.entry(path).text
+
+    def version(self, path):
+        # content hash of the template, changes whenever the text changes
+        return self.entry(path).digest
+
+    def clear(self):
+        self._entries.clear()
+
+
+template_cache = TemplateCache()
+
+
+def lookup_contexts(context):
+    # same search order as mailman's own template loader
+    if IMailingList.providedBy(context):
+        return [context.list_id, context.mail_host, None]
+    if IDomain.providedBy(context):
+        return [context.mail_host, None]
+    return [None]
+
+
+@public
+@implementer(ITemplateLoader)
+class BrandwerderTemplateLoader:
+    """Serves our german templates from `template_cache`.
+
+    Every other template is handed over to mailman's original loader.
+    """
+
+    def __init__(self, loader):
+        self._loader = loader
+
+    def get(self, name, context=None, **kws):
+        manager = getUtility(ITemplateManager)
+        for lookup_context in lookup_contexts(context):
+            template = manager.raw(name, lookup_context)
+            if template is None:
+                continue
+
+            path = TEMPLATE_PATHS.get(template.uri)
+            if path is not None and template.username is None:
+                return template_cache.read(path)
+            break
+        return self._loader.get(name, context, **kws)
+
+    @staticmethod
+    def install():
+        loader = getUtility(ITemplateLoader)
+        if isinstance(loader, BrandwerderTemplateLoader):
+            return
+
+        getGlobalSiteManager().registerUtility(
+            BrandwerderTemplateLoader(loader), ITemplateLoader)
@@ -1,36 +1,99 @@
+from mailman.config import config
+from mailman.database.transaction import transaction
 from mailman.interfaces.template import ITemplateManager, ALL_TEMPLATES
+from mailman.model.template import Template
 from zope.component import getUtility
+from ..instrumentation import timed
+from types import MappingProxyType
+import logging
 import pathlib
-import os
 from public import public
 
+log = logging.getLogger('mailman.plugins')
+
+# The german templates are scanned once when the plugin is loaded, the index
+# maps the template file name (e.g. `list:user:notice:welcome.txt`) to its
+# `file://` uri.
+TEMPLATE_DIR = pathlib.Path(__file__).resolve().parent / 'de'
+
+
+def scan_templates(directory):
+    return MappingProxyType({
+        path.name: 'file://' + str(path)
+        for path in sorted(directory.glob('*.txt'))
+    })
+
+
+TEMPLATE_URIS = scan_templates(TEMPLATE_DIR)
+
+
 @public
 class BrandwerderTemplate:
     name = 'brandwerder-template'
 
     @staticmethod
-    def set_template(name, context, uri):
-        current_dir = os.path.dirname(os.path.abspath(__file__)) + '/de/'
-        manager = getUtility(ITemplateManager)
-
-        file_path = current_dir + uri
-        file_abs_path = pathlib.Path(file_path).resolve()
-        # file_uri = file_abs_path.as_uri()
-        file_uri = 'file://' + str(file_abs_path)
-        # print(name + ": " + file_path)
-        # print(name + ": " + str(file_abs_path))
-        # print(name + " (" + str(context) + "): " + file_uri)
-        # print(name + " exists?: " + str(file_abs_path.exists()))
-        if file_abs_path.exists():
-            manager.set(name, context, file_uri)
-            # template = manager.get(name, context)
-            # print(template)
-        # print()
+    @timed('templates.set_template')
+    def set_template(name, context, uri, manager=None):
+        file_uri = TEMPLATE_URIS.get(uri)
+        if file_uri is None:
+            return
+
+        if manager is None:
+            manager = getUtility(ITemplateManager)
+        manager.set(name, context, file_uri)
 
     @staticmethod
-    def apply():
+    def update_template(name, context, uri, manager=None):
+        # like set_template, but only writes if the template changed
+        file_uri = TEMPLATE_URIS.get(uri)
+        if file_uri is None:
+            return False
+
+        if manager is None:
+            manager = getUtility(ITemplateManager)
+        template = manager.raw(name, context)
+        if template is not None and template.uri == file_uri:
+            return False
+
+        BrandwerderTemplate.set_template(name, context, uri, manager)
+        return True
+
+    @staticmethod
+    def site_templates():
+        # name -> file uri of all site-wide templates we have a german file for
+        templates = {}
         for name, uri in ALL_TEMPLATES.items():
-            if uri is None:
+            if uri is None or uri not in TEMPLATE_URIS:
                 continue
 
-            BrandwerderTemplate.set_template(name, None, uri)
+            templates[name] = TEMPLATE_URIS[uri]
+        return templates
+
+    @staticmethod
+    @timed('templates.apply')
+    def apply():
+        # Every runner calls this on start, so only write the templates whose
+        # row is missing or points somewhere else.
+        wanted = BrandwerderTemplate.site_templates()
+        store = config.db.store
+        current = {
+            template.name: template
+            for template in store.query(Template).filter(
+                Template.context.is_(None),
+                Template.name.in_(list(wanted)))
+        }
+
+        changed = 0
+        with transaction():
+            for name, file_uri in wanted.items():
+                template = current.get(name)
+                if template is None:
+                    store.add(Template(name, None, file_uri, None, ''))
+                elif template.uri != file_uri or template.username is not None:
+                    template.reset(file_uri, None, '')
+                else:
+                    continue
+                changed += 1
+
+        log.info('brandwerder templates: %d written, %d skipped',
+                 changed, len(wanted) - changed)
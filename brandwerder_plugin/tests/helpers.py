@@ -0,0 +1,42 @@
+"""Mailman's own test configuration (a fresh SQLite database in a temporary
+var directory) for the tests that need mailing lists."""
+
+import atexit
+import unittest
+
+from mailman.config import config
+from mailman.interfaces.handler import IHandler
+from mailman.interfaces.pipeline import IPipeline
+from mailman.testing.layers import ConfigLayer
+from mailman.utilities.modules import find_components
+
+
+def set_up_mailman():
+    # the layer can only be set up once per process
+    if ConfigLayer.var_dir is not None:
+        return
+    ConfigLayer.setUp()
+    atexit.register(ConfigLayer.tearDown)
+
+    # the testing configuration does not enable the plugin, add its handlers
+    # and pipelines the way initialize_pipelines() does
+    for package, interface, components in (
+            ('handlers', IHandler, config.handlers),
+            ('pipelines', IPipeline, config.pipelines)):
+        for component in find_components(
+                'brandwerder_plugin.' + package, interface):
+            components[component.name] = component()
+
+
+class MailmanTestCase(unittest.TestCase):
+    """Every test starts with the domain example.com and no lists."""
+
+    @classmethod
+    def setUpClass(cls):
+        set_up_mailman()
+
+    def setUp(self):
+        ConfigLayer.testSetUp()
+
+    def tearDown(self):
+        ConfigLayer.testTearDown()
@@ -0,0 +1,213 @@
+"""Pooled delivery against an aiosmtpd stand-in for the MTA."""
+
+import os
+import socket
+import tempfile
+import unittest
+
+try:
+    from aiosmtpd.controller import Controller
+except ImportError:
+    raise unittest.SkipTest('aiosmtpd is not installed')
+
+from brandwerder_plugin import delivery
+from brandwerder_plugin.delivery import (
+    PooledDelivery, SMTPPool, deliver, split_failures)
+from brandwerder_plugin.tests.helpers import MailmanTestCase
+from mailman.app.lifecycle import create_list
+from mailman.config import config
+from mailman.interfaces.template import ITemplateManager
+from mailman.testing.helpers import specialized_message_from_string
+from zope.component import getUtility
+
+SENDER = 'klasse-5a-bounces@lists.brandwerder.de'
+MESSAGE = b'Subject: Test\r\n\r\nHallo\r\n'
+
+
+class Handler:
+    def __init__(self):
+        self.sessions = []
+        self.delivered = []
+        self.messages = []
+        self.defer_rcpt = set()
+        self.defer_data = False
+        self.drop_rcpt = set()
+
+    async def handle_RCPT(self, server, session, envelope, address,
+                          rcpt_options):
+        if address in self.drop_rcpt:
+            server.transport.abort()
+            return '250 OK'
+        if address in self.defer_rcpt:
+            return '451 4.3.0 Versuchen Sie es spaeter'
+        envelope.rcpt_tos.append(address)
+        return '250 OK'
+
+    async def handle_DATA(self, server, session, envelope):
+        if self.defer_data:
+            return '451 4.3.0 Warteschlange voll'
+        if not any(known is session for known in self.sessions):
+            self.sessions.append(session)
+        self.delivered.extend(envelope.rcpt_tos)
+        self.messages.append(envelope.content)
+        return '250 OK'
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def recipients(count):
+    return ['schueler{}@example.com'.format(index) for index in range(count)]
+
+
+class TestPooledDelivery(unittest.TestCase):
+    def setUp(self):
+        self.port = free_port()
+        self.handler = Handler()
+        self.controller = self._start()
+        self.delivery = PooledDelivery(
+            SMTPPool('127.0.0.1', self.port, size=2, timeout=5),
+            chunk_size=3)
+
+    def tearDown(self):
+        self.delivery.close()
+        self.controller.stop()
+
+    def _start(self):
+        controller = Controller(
+            self.handler, hostname='127.0.0.1', port=self.port)
+        controller.start()
+        return controller
+
+    def _refused(self, chunks):
+        refused = {}
+        for chunk in chunks:
+            refused.update(chunk.refused)
+        return refused
+
+    def test_sessions_are_reused(self):
+        for _ in range(5):
+            chunks = self.delivery.send(SENDER, recipients(6), MESSAGE)
+            self.assertEqual(len(chunks), 2)
+            self.assertEqual(self._refused(chunks), {})
+        self.assertEqual(len(self.handler.delivered), 30)
+        # two workers, never more than two sessions
+        self.assertLessEqual(len(self.handler.sessions), 2)
+
+    def test_temporary_failure_on_rcpt(self):
+        addresses = recipients(6)
+        self.handler.defer_rcpt = {addresses[1]}
+        refused = self._refused(
+            self.delivery.send(SENDER, addresses, MESSAGE))
+        self.assertEqual(list(refused), [addresses[1]])
+        self.assertEqual(refused[addresses[1]][0], 451)
+        self.assertEqual(split_failures(refused), ([addresses[1]], []))
+        self.assertEqual(len(self.handler.delivered), 5)
+
+    def test_temporary_failure_on_data(self):
+        addresses = recipients(6)
+        self.handler.defer_data = True
+        refused = self._refused(
+            self.delivery.send(SENDER, addresses, MESSAGE))
+        # no recipient is lost, all of them are retried later
+        self.assertEqual(sorted(refused), sorted(addresses))
+        self.assertEqual(
+            {code for code, message in refused.values()}, {451})
+        temporary, permanent = split_failures(refused)
+        self.assertEqual(sorted(temporary), sorted(addresses))
+        self.assertEqual(permanent, [])
+
+    def test_dropped_connection(self):
+        addresses = recipients(6)
+        self.handler.drop_rcpt = {addresses[4]}
+        chunks = self.delivery.send(SENDER, addresses, MESSAGE)
+        # only the chunk of the dropped connection fails, temporarily
+        self.assertEqual(chunks[0].refused, {})
+        self.assertEqual(sorted(chunks[1].refused), addresses[3:])
+        self.assertEqual(
+            {code for code, message in chunks[1].refused.values()}, {444})
+        self.assertEqual(self.handler.delivered, addresses[:3])
+
+    def test_reconnect_after_server_restart(self):
+        self.delivery.send(SENDER, recipients(3), MESSAGE)
+        # the idle session is closed by the restart
+        self.controller.stop()
+        self.controller = self._start()
+        chunks = self.delivery.send(SENDER, recipients(3), MESSAGE)
+        self.assertEqual(self._refused(chunks), {})
+        self.assertEqual(len(self.handler.delivered), 6)
+
+
+class TestSplitFailures(unittest.TestCase):
+    def test_codes(self):
+        temporary, permanent = split_failures({
+            'a@example.com': (450, b'mailbox busy'),
+            'b@example.com': (550, b'no such user'),
+            'c@example.com': (552, b'too many recipients'),
+            'd@example.com': (444, 'connection lost'),
+        })
+        self.assertEqual(
+            sorted(temporary), ['a@example.com', 'c@example.com', 'd@example.com'])
+        self.assertEqual(permanent, ['b@example.com'])
+
+
+class TestDeliver(MailmanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.handler = Handler()
+        self.controller = Controller(
+            self.handler, hostname='127.0.0.1', port=free_port())
+        self.controller.start()
+        config.push('smtp', """
+        [mta]
+        smtp_host: 127.0.0.1
+        smtp_port: {}
+        """.format(self.controller.port))
+        self.mlist = create_list('eltern@example.com')
+        # a header in a template file, the footer is mailman's default
+        fd, self.header_file = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as fp:
+            fp.write('Elternverteiler der Schule\n')
+        getUtility(ITemplateManager).set(
+            'list:member:regular:header', self.mlist.list_id,
+            'file://' + self.header_file)
+
+    def tearDown(self):
+        delivery.get_delivery().close()
+        delivery._delivery = None
+        config.pop('smtp')
+        self.controller.stop()
+        os.remove(self.header_file)
+        super().tearDown()
+
+    def _message(self):
+        return specialized_message_from_string("""\
+From: anne@example.com
+To: eltern@example.com
+Subject: Elternabend
+Message-ID: <elternabend@example.com>
+
+Am Montag um 19 Uhr.
+""")
+
+    def test_header_and_footer(self):
+        deliver(self.mlist, self._message(), dict(recipients=recipients(3)))
+        self.assertEqual(len(self.handler.messages), 1)
+        body = self.handler.messages[0].decode()
+        self.assertIn('Elternverteiler der Schule\n', body)
+        self.assertIn('Am Montag um 19 Uhr.', body)
+        self.assertIn('eltern-leave@example.com', body)
+
+    def test_class_list_is_decorated_once(self):
+        self.mlist.posting_pipeline = 'brandwerder-posting-pipeline'
+        msg = self._message()
+        msgdata = dict(recipients=recipients(3))
+        config.handlers['brandwerder-footer'].process(
+            self.mlist, msg, msgdata)
+        deliver(self.mlist, msg, msgdata)
+        body = self.handler.messages[0].decode()
+        self.assertEqual(body.count('Elternverteiler der Schule'), 1)
+        self.assertEqual(body.count('eltern-leave@example.com'), 1)
@@ -0,0 +1,135 @@
+"""Attaching the pre-rendered footer."""
+
+import unittest
+
+from brandwerder_plugin.handlers.brandwerder_footer import (
+    Footer, attach, footer_cache)
+from brandwerder_plugin.tests.helpers import MailmanTestCase
+from email import message_from_string
+from email.mime.text import MIMEText
+from mailman.app.lifecycle import create_list
+from mailman.config import config
+
+FOOTER = 'Klasse 5a\nAbmelden: klasse-5a-leave@lists.brandwerder.de\n'
+HEADER = 'Nachricht an die Klasse 5a\n'
+
+
+def footer():
+    part = MIMEText(FOOTER, _charset='utf-8')
+    part['Content-Disposition'] = 'inline'
+    return Footer(None, FOOTER, part)
+
+
+class TestAttach(unittest.TestCase):
+    def test_text_plain_inline(self):
+        msg = message_from_string(
+            'Subject: Ausflug\n'
+            'Content-Type: text/plain; charset="us-ascii"; format="flowed"\n'
+            '\n'
+            'Morgen um 8 Uhr.')
+        attach(msg, footer(), 'utf-8')
+        self.assertFalse(msg.is_multipart())
+        self.assertEqual(msg.get_param('format'), 'flowed')
+        self.assertEqual(
+            msg.get_payload(decode=True).decode(msg.get_content_charset()),
+            'Morgen um 8 Uhr.\n' + FOOTER)
+
+    def test_undecodable_body_is_wrapped(self):
+        msg = message_from_string(
+            'Subject: Ausflug\n'
+            'Content-Type: text/plain; charset="x-unknown"\n'
+            '\n'
+            'Morgen um 8 Uhr.\n')
+        attach(msg, footer(), 'utf-8')
+        self.assertEqual(msg.get_content_type(), 'multipart/mixed')
+        body, part = msg.get_payload()
+        self.assertEqual(body.get_content_charset(), 'x-unknown')
+        self.assertEqual(part.get_payload(decode=True).decode(), FOOTER)
+
+    def test_html_is_wrapped(self):
+        msg = message_from_string(
+            'Subject: Ausflug\n'
+            'Content-Type: text/html; charset="utf-8"\n'
+            '\n'
+            '<p>Morgen um 8 Uhr.</p>\n')
+        attach(msg, footer(), 'utf-8')
+        self.assertEqual(msg.get_content_type(), 'multipart/mixed')
+        self.assertEqual(
+            [part.get_content_type() for part in msg.get_payload()],
+            ['text/html', 'text/plain'])
+
+    def test_multipart_mixed_appended(self):
+        msg = message_from_string(
+            'Subject: Ausflug\n'
+            'Content-Type: multipart/mixed; boundary="b"\n'
+            '\n'
+            '--b\n'
+            'Content-Type: text/plain\n'
+            '\n'
+            'Morgen um 8 Uhr.\n'
+            '--b--\n')
+        attach(msg, footer(), 'utf-8')
+        self.assertEqual(len(msg.get_payload()), 2)
+        self.assertEqual(
+            msg.get_payload(1).get_payload(decode=True).decode(), FOOTER)
+
+
+class TestHeader(unittest.TestCase):
+    def header(self):
+        part = MIMEText(HEADER, _charset='utf-8')
+        part['Content-Disposition'] = 'inline'
+        return Footer(None, HEADER, part)
+
+    def test_text_plain_inline(self):
+        msg = message_from_string(
+            'Subject: Ausflug\n'
+            'Content-Type: text/plain; charset="us-ascii"\n'
+            '\n'
+            'Morgen um 8 Uhr.\n')
+        attach(msg, footer(), 'utf-8', self.header())
+        self.assertEqual(
+            msg.get_payload(decode=True).decode(msg.get_content_charset()),
+            HEADER + 'Morgen um 8 Uhr.\n' + FOOTER)
+
+    def test_html_is_wrapped(self):
+        msg = message_from_string(
+            'Subject: Ausflug\n'
+            'Content-Type: text/html; charset="utf-8"\n'
+            '\n'
+            '<p>Morgen um 8 Uhr.</p>\n')
+        attach(msg, footer(), 'utf-8', self.header())
+        self.assertEqual(
+            [part.get_content_type() for part in msg.get_payload()],
+            ['text/plain', 'text/html', 'text/plain'])
+        self.assertEqual(
+            msg.get_payload(0).get_payload(decode=True).decode(), HEADER)
+
+
+class TestPostingPipeline(MailmanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.mlist = create_list('klasse-5a@example.com')
+        self.mlist.posting_pipeline = 'brandwerder-posting-pipeline'
+        footer_cache.clear()
+
+    def test_footer_before_to_outgoing(self):
+        pipeline = config.pipelines[self.mlist.posting_pipeline]
+        self.assertEqual(
+            [handler.name for handler in pipeline][-2:],
+            ['brandwerder-footer', 'to-outgoing'])
+
+    def test_footer_appended(self):
+        msg = message_from_string(
+            'From: anne@example.com\n'
+            'To: klasse-5a@example.com\n'
+            'Subject: Ausflug\n'
+            'Message-ID: <ausflug@example.com>\n'
+            '\n'
+            'Morgen um 8 Uhr.\n')
+        msgdata = {}
+        config.handlers['brandwerder-footer'].process(
+            self.mlist, msg, msgdata)
+        body = msg.get_payload(decode=True).decode()
+        self.assertTrue(body.startswith('Morgen um 8 Uhr.\n'))
+        self.assertIn('klasse-5a-leave@example.com', body)
+        self.assertTrue(msgdata['nodecorate'])
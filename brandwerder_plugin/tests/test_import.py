@@ -0,0 +1,69 @@
+"""The plugin modules every Mailman process imports at startup."""
+
+import os
+import subprocess
+import sys
+import unittest
+
+from mailman.interfaces.command import ICLISubCommand
+from mailman.interfaces.handler import IHandler
+from mailman.interfaces.pipeline import IPipeline
+from mailman.interfaces.styles import IStyle
+from mailman.utilities.modules import find_components
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))))
+
+COMPONENTS = (
+    ('commands', ICLISubCommand, {'klassen', 'restyle', 'roster'}),
+    ('handlers', IHandler, {'brandwerder-footer'}),
+    ('pipelines', IPipeline, {'brandwerder-posting-pipeline'}),
+    ('styles', IStyle, {'brandwerder-style'}),
+)
+
+# like a runner: initialize, import the components, run post_hook, then list
+# the plugin modules that got imported
+STARTUP = """\
+import sys
+from mailman.testing.layers import ConfigLayer
+ConfigLayer.setUp()
+from mailman.interfaces.command import ICLISubCommand
+from mailman.interfaces.handler import IHandler
+from mailman.interfaces.pipeline import IPipeline
+from mailman.interfaces.styles import IStyle
+from mailman.utilities.modules import find_components
+for package, interface in (('commands', ICLISubCommand),
+                           ('handlers', IHandler),
+                           ('pipelines', IPipeline),
+                           ('styles', IStyle)):
+    list(find_components('brandwerder_plugin.' + package, interface))
+from brandwerder_plugin.hooks import BrandwerderPlugin
+BrandwerderPlugin().post_hook()
+print(' '.join(name for name in sys.modules
+               if name.startswith('brandwerder_plugin')))
+ConfigLayer.tearDown()
+"""
+
+
+class TestComponents(unittest.TestCase):
+    def test_find_components(self):
+        # the way Mailman finds them in the plugin's subpackages
+        for package, interface, names in COMPONENTS:
+            with self.subTest(package=package):
+                found = find_components(
+                    'brandwerder_plugin.' + package, interface)
+                self.assertEqual(
+                    {component.name for component in found}, names)
+
+
+class TestStartup(unittest.TestCase):
+    def test_startup(self):
+        result = subprocess.run(
+            [sys.executable, '-c', STARTUP], cwd=ROOT,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            universal_newlines=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        modules = result.stdout.split()
+        self.assertIn('brandwerder_plugin.hooks', modules)
+        # only the REST runner needs the resource
+        self.assertNotIn('brandwerder_plugin.resource', modules)
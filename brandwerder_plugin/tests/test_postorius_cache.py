@@ -0,0 +1,77 @@
+"""Invalidating the Postorius cache after list writes are committed."""
+
+import threading
+
+from brandwerder_plugin.postorius_cache import PostoriusCache
+from brandwerder_plugin.tests.helpers import MailmanTestCase
+from mailman.app.lifecycle import create_list, remove_list
+from mailman.config import config
+from mailman.database.transaction import transaction
+from sqlalchemy.event import remove
+
+
+class RecordingCache(PostoriusCache):
+    def __init__(self):
+        super().__init__('http://localhost:9/')
+        self.invalidated = threading.Semaphore(0)
+
+    def invalidate(self):
+        self.invalidated.release()
+
+
+class TestPostoriusCache(MailmanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = RecordingCache()
+        self.cache.subscribe()
+
+    def tearDown(self):
+        remove(config.db.store, 'before_flush', self.cache._before_flush)
+        remove(config.db.store, 'after_commit', self.cache._after_commit)
+        remove(config.db.store, 'after_soft_rollback',
+               self.cache._after_rollback)
+        super().tearDown()
+
+    def assertInvalidated(self):
+        self.assertTrue(self.cache.invalidated.acquire(timeout=5))
+
+    def assertNotInvalidated(self):
+        self.assertFalse(self.cache.invalidated.acquire(timeout=0.2))
+
+    def test_create_list(self):
+        with transaction():
+            create_list('klasse-5a@example.com')
+        self.assertInvalidated()
+
+    def test_list_settings(self):
+        with transaction():
+            mlist = create_list('klasse-5a@example.com')
+        self.assertInvalidated()
+        with transaction():
+            mlist.display_name = 'Klasse 5a'
+        self.assertInvalidated()
+
+    def test_unchanged_list(self):
+        with transaction():
+            mlist = create_list('klasse-5a@example.com')
+        self.assertInvalidated()
+        with transaction():
+            mlist.display_name = mlist.display_name
+        self.assertNotInvalidated()
+
+    def test_rollback(self):
+        with transaction():
+            mlist = create_list('klasse-5a@example.com')
+        self.assertInvalidated()
+        mlist.description = 'Die Klasse 5a'
+        config.db.store.flush()
+        config.db.abort()
+        self.assertNotInvalidated()
+
+    def test_remove_list(self):
+        with transaction():
+            mlist = create_list('klasse-5a@example.com')
+        self.assertInvalidated()
+        with transaction():
+            remove_list(mlist)
+        self.assertInvalidated()
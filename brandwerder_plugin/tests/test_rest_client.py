@@ -0,0 +1,106 @@
+"""BulkTemplateClient against a stub of the Mailman REST API."""
+
+import asyncio
+import unittest
+
+from urllib.parse import parse_qs
+
+from brandwerder_plugin.rest_client import (
+    BulkTemplateClient, RESTError, klasse_bindings)
+
+
+class StubServer:
+    """Answers every PATCH with `status_line`, optionally closes the
+    connection after `requests_per_connection` requests without telling the
+    client."""
+
+    def __init__(self, status_line=b'HTTP/1.1 204', requests_per_connection=0):
+        self.status_line = status_line
+        self.requests_per_connection = requests_per_connection
+        self.connections = 0
+        self.requests = []
+
+    async def handle(self, reader, writer):
+        self.connections += 1
+        handled = 0
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(
+                    int(headers.get('content-length', 0)))
+                method, path, _ = request_line.decode('latin-1').split(' ')
+                self.requests.append((method, path, parse_qs(body.decode())))
+                writer.write(self.status_line + b'\r\nContent-Length: 0\r\n\r\n')
+                await writer.drain()
+                handled += 1
+                if handled == self.requests_per_connection:
+                    break
+        finally:
+            writer.close()
+
+    async def run(self, client, bindings):
+        server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        client._port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await client.bind_async(bindings)
+
+
+def bindings(count):
+    return klasse_bindings(
+        ['klasse-{}a.lists.brandwerder.de'.format(index)
+         for index in range(count)],
+        'file:///welcome-klasse.txt', 'file:///goodbye-klasse.txt')
+
+
+class TestBulkTemplateClient(unittest.TestCase):
+    def client(self, concurrency=2):
+        return BulkTemplateClient(
+            'http://127.0.0.1:8001', 'restadmin', 'restpass',
+            concurrency=concurrency)
+
+    def test_status_line_without_reason(self):
+        server = StubServer()
+        result = asyncio.run(server.run(self.client(), bindings(10)))
+        self.assertEqual(result.done, 10)
+        self.assertEqual(result.errors, [])
+        # one keep-alive connection per worker
+        self.assertEqual(server.connections, 2)
+        method, path, fields = server.requests[0]
+        self.assertEqual(method, 'PATCH')
+        self.assertEqual(path, '/3.1/lists/klasse-0a.lists.brandwerder.de/uris')
+        self.assertEqual(fields['list:user:notice:welcome'],
+                         ['file:///welcome-klasse.txt'])
+
+    def test_retry_when_server_closed_keep_alive(self):
+        server = StubServer(b'HTTP/1.1 204 No Content', 3)
+        result = asyncio.run(
+            server.run(self.client(concurrency=1), bindings(10)))
+        self.assertEqual(result.done, 10)
+        self.assertEqual(result.errors, [])
+        self.assertEqual(len(server.requests), 10)
+        self.assertEqual(server.connections, 4)
+
+    def test_error_status(self):
+        server = StubServer(b'HTTP/1.1 404 Not Found')
+        result = asyncio.run(server.run(self.client(), bindings(3)))
+        self.assertEqual(result.done, 0)
+        self.assertEqual(len(result.errors), 3)
+        list_id, error = result.errors[0]
+        self.assertIsInstance(error, RESTError)
+        self.assertEqual((error.status, error.reason), (404, 'Not Found'))
+
+    def test_https_base_url(self):
+        client = BulkTemplateClient(
+            'https://lists.brandwerder.de/mailman', 'restadmin', 'restpass')
+        self.assertEqual(client._port, 443)
+        self.assertIsNotNone(client._ssl)
+        self.assertEqual(client._prefix, '/mailman/3.1')
@@ -0,0 +1,66 @@
+"""Updating the Postfix hash maps per list."""
+
+import os
+import shutil
+import sys
+import tempfile
+
+from brandwerder_plugin.tests.helpers import MailmanTestCase
+from brandwerder_plugin.transport import IncrementalLMTP
+from mailman.app.lifecycle import create_list
+from mailman.config import config
+
+# stands in for postmap, logs its arguments and input
+POSTMAP = """\
+import sys
+with open(sys.argv[1], 'a') as fp:
+    print(' '.join(sys.argv[2:]), sys.stdin.read().split(), file=fp)
+"""
+
+
+class TestIncrementalLMTP(MailmanTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        script = os.path.join(self.directory, 'postmap.py')
+        with open(script, 'w') as fp:
+            fp.write(POSTMAP)
+        self.log = os.path.join(self.directory, 'postmap.log')
+        self.mta = IncrementalLMTP()
+        self.mta.postmap_command = '{} {} {}'.format(
+            sys.executable, script, self.log)
+        self.mlist = create_list('klasse-5a@example.com')
+
+    def calls(self):
+        with open(self.log) as fp:
+            return fp.read().splitlines()
+
+    def assertTextMapsUntouched(self):
+        for name in ('postfix_lmtp', 'postfix_domains'):
+            self.assertFalse(
+                os.path.exists(os.path.join(config.DATA_DIR, name)), name)
+
+    def test_create(self):
+        self.mta.create(self.mlist)
+        lmtp, domains = self.calls()
+        self.assertTrue(lmtp.startswith('-r -i hash:' + os.path.join(
+            config.DATA_DIR, 'postfix_lmtp')))
+        self.assertIn("'klasse-5a-bounces@example.com',", lmtp)
+        self.assertTrue(domains.endswith(
+            "postfix_domains ['example.com', 'example.com']"))
+        self.assertTextMapsUntouched()
+
+    def test_delete(self):
+        self.mta.delete(self.mlist)
+        lmtp, domains = self.calls()
+        self.assertTrue(lmtp.startswith('-d - hash:'))
+        self.assertIn("'klasse-5a@example.com',", lmtp)
+        self.assertTrue(domains.endswith("postfix_domains ['example.com']"))
+        self.assertTextMapsUntouched()
+
+    def test_delete_keeps_domain(self):
+        create_list('klasse-5b@example.com')
+        self.mta.delete(self.mlist)
+        lmtp, = self.calls()
+        self.assertIn('postfix_lmtp', lmtp)
@@ -0,0 +1,139 @@
+from flufl.lock import Lock
+from mailman.config import config
+from mailman.interfaces.domain import IDomainManager
+from mailman.interfaces.mta import (
+    IMailTransportAgentAliases, IMailTransportAgentLifecycle)
+from mailman.model.mailinglist import MailingList
+from mailman.mta.postfix import ALIASTMPL, LMTP, _FakeList
+from public import public
+from zope.component import getUtility
+from zope.interface import implementer
+from .instrumentation import timed
+import logging
+import os
+import shlex
+import subprocess
+
+log = logging.getLogger('mailman.error')
+
+# Postfix transport and relay domain maps, updated per list.
+#
+# mailman.mta.postfix.LMTP rewrites postfix_lmtp and postfix_domains and runs
+# postmap over both for every created or deleted list, so creating a school
+# year of klasse-* lists is quadratic. Here create() and delete() only add or
+# remove the entries of that list in the hash maps Postfix reads (`postmap -i`
+# / `postmap -d`), the text files are not touched. They are written by
+# regenerate() (`mailman aliases`) only, which builds everything into new files
+# which are renamed over the old ones, so Postfix never sees a half written
+# map. Run `mailman aliases` instead of postmap over the text files.
+#
+# Lists in alias domains and regex maps are handled by LMTP as before.
+
+
+@public
+@implementer(IMailTransportAgentLifecycle)
+class IncrementalLMTP(LMTP):
+    def _postmap(self, options, path, lines=None):
+        command = shlex.split(self.postmap_command) + options + ['hash:' + path]
+        process = subprocess.run(
+            command, input='\n'.join(lines) + '\n' if lines else None,
+            universal_newlines=True,
+            stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        return process.returncode, process.stdout.strip()
+
+    def _update(self, path, lines):
+        status, output = self._postmap(['-r', '-i'], path, lines)
+        if status:
+            log.error('command failure: postmap -i %s: %s', path, output)
+            raise RuntimeError('postmap -i {} failed: {}'.format(path, output))
+
+    def _remove(self, path, keys):
+        # exit status 1 only means that none of the keys was in the map
+        status, output = self._postmap(['-d', '-'], path, keys)
+        if status > 1:
+            log.error('command failure: postmap -d %s: %s', path, output)
+            raise RuntimeError('postmap -d {} failed: {}'.format(path, output))
+
+    def _incremental(self, mlist):
+        if self.transport_file_type != 'hash':
+            return False
+        domain = getUtility(IDomainManager).get(mlist.mail_host)
+        return domain is None or not domain.alias_domain
+
+    @staticmethod
+    def _aliases(mlist):
+        return list(getUtility(IMailTransportAgentAliases).aliases(
+            _FakeList(mlist.list_name, mlist.mail_host)))
+
+    @staticmethod
+    def _other_lists(mlist):
+        return config.db.store.query(MailingList).filter(
+            MailingList.mail_host == mlist.mail_host,
+            MailingList._list_id != mlist.list_id).count()
+
+    @timed('mta.create')
+    def create(self, mlist):
+        """See `IMailTransportAgentLifecycle`."""
+        if not self._incremental(mlist):
+            return super().create(mlist)
+
+        aliases = self._aliases(mlist)
+        width = max(len(alias) for alias in aliases) + \
+            aliases[0].count('.') + 10
+        lmtp = [ALIASTMPL.format(alias, config, width) for alias in aliases]
+        domains = ['{0} {0}'.format(mlist.mail_host)]
+        with Lock(os.path.join(config.LOCK_DIR, 'mta')):
+            path = os.path.join(config.DATA_DIR, 'postfix_lmtp')
+            self._update(path, lmtp)
+            path = os.path.join(config.DATA_DIR, 'postfix_domains')
+            self._update(path, domains)
+
+    @timed('mta.delete')
+    def delete(self, mlist):
+        """See `IMailTransportAgentLifecycle`."""
+        if not self._incremental(mlist):
+            return super().delete(mlist)
+
+        aliases = self._aliases(mlist)
+        with Lock(os.path.join(config.LOCK_DIR, 'mta')):
+            path = os.path.join(config.DATA_DIR, 'postfix_lmtp')
+            self._remove(path, aliases)
+            if not self._other_lists(mlist):
+                path = os.path.join(config.DATA_DIR, 'postfix_domains')
+                self._remove(path, [mlist.mail_host])
+
+    @timed('mta.regenerate')
+    def regenerate(self, directory=None):
+        """See `IMailTransportAgentLifecycle`."""
+        if self.transport_file_type != 'hash':
+            return super().regenerate(directory)
+
+        if directory is None:
+            directory = config.DATA_DIR
+        with Lock(os.path.join(config.LOCK_DIR, 'mta')):
+            maps = []
+            for name, generate in (
+                    ('postfix_lmtp', self._generate_lmtp_file),
+                    ('postfix_domains', self._generate_domains_file),
+                    ('postfix_vmap', self._generate_vmap_file)):
+                path = os.path.join(directory, name)
+                with open(path + '.new', 'w', encoding='utf-8') as fp:
+                    written = generate(fp)
+                # _generate_vmap_file() returns False if there are no lists
+                # in alias domains, the text file is removed then like LMTP does
+                if name == 'postfix_vmap' and not written:
+                    os.remove(path + '.new')
+                    if os.path.exists(path):
+                        os.remove(path)
+                    continue
+                status, output = self._postmap([], path + '.new')
+                if status:
+                    log.error('command failure: postmap %s: %s', path, output)
+                    raise RuntimeError(
+                        'postmap {} failed: {}'.format(path, output))
+                maps.append(path)
+
+            # the maps are all built, now swap them in
+            for path in maps:
+                os.replace(path + '.new.db', path + '.db')
+                os.replace(path + '.new', path)
@@ -0,0 +1,105 @@
+"""Render time of the list index and list summary pages.
+
+Compares the settings.py template setup (no cached loader, all context
+processors) with the one of settings_production. The Mailman REST API is not
+needed, the pages are rendered with synthetic lists.
+
+Usage: python benchmarks/bench_render.py [renders] [lists]
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings_production')
+
+
+def setup():
+    from django.conf import settings
+    settings.DATABASES = {
+        'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    }
+    settings.ALLOWED_HOSTS = ['localhost']
+    import django
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def mailing_list(number):
+    name = 'klasse-{}{}'.format(number // 6 + 1, 'abcdef'[number % 6])
+    return SimpleNamespace(
+        list_id='{}.lists.brandwerder.de'.format(name),
+        fqdn_listname='{}@lists.brandwerder.de'.format(name),
+        list_name=name,
+        mail_host='lists.brandwerder.de',
+        display_name='Klasse {}'.format(name[7:]),
+        description='Die Mailingliste der Klasse {}'.format(name[7:]),
+        settings={'advertised': False, 'archive_policy': 'never'},
+        member_count=25,
+        owners=[], moderators=[],
+    )
+
+
+def pages(count):
+    from django.core.paginator import Paginator
+    lists = [mailing_list(number) for number in range(count)]
+    return [
+        ('list index', 'postorius/index.html',
+         {'lists': Paginator(lists, 50).page(1), 'all_lists': lists,
+          'domain_count': 1}),
+        ('list summary', 'postorius/lists/summary.html',
+         {'list': lists[0], 'userSubscribed': False,
+          'subscribe_form': None, 'user_emails': []}),
+    ]
+
+
+def request():
+    from django.contrib.auth.models import AnonymousUser
+    from django.contrib.messages.storage.fallback import FallbackStorage
+    from django.test import RequestFactory
+    request = RequestFactory().get('/postorius/lists/', HTTP_HOST='localhost')
+    request.user = AnonymousUser()
+    request.session = {}
+    request._messages = FallbackStorage(request)
+    return request
+
+
+def run(templates, renders, lists):
+    from django.template import engines
+    from django.test.utils import override_settings
+
+    results = {}
+    with override_settings(TEMPLATES=templates):
+        engine = engines['django']
+        for name, template_name, context in pages(lists):
+            timings = []
+            for _ in range(renders):
+                start = time.perf_counter()
+                engine.get_template(template_name).render(context, request())
+                timings.append(time.perf_counter() - start)
+            timings.sort()
+            results[name] = timings
+    return results
+
+
+def main(renders=200, lists=60):
+    renders, lists = int(renders), int(lists)
+    setup()
+    import settings as development
+    from django.conf import settings
+
+    for profile, templates in (('settings', development.TEMPLATES),
+                               ('settings_production', settings.TEMPLATES)):
+        for name, timings in run(templates, renders, lists).items():
+            print('{:<20} {:<13} mean {:7.3f}ms  p95 {:7.3f}ms'.format(
+                profile, name,
+                1000 * sum(timings) / len(timings),
+                1000 * timings[int(len(timings) * 0.95)]))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,59 @@
+"""Index time and query latency of the SQLite FTS5 index as the corpus grows.
+
+Usage: python benchmarks/bench_search.py [max documents]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+
+from brandwerder_suite.fts import FTSIndex  # noqa: E402
+
+WORDS = ('Elternabend Klassenfahrt Wandertag Schulfest Zeugnis Hausaufgaben '
+         'Sportfest Ausflug Bibliothek Elternvertreter Lehrerin Mathematik '
+         'Deutsch Sachkunde Kunst Musik Hort Ferien Termin Treffen').split()
+
+
+def documents(start, count):
+    rng = random.Random(start)
+    for number in range(start, start + count):
+        text = ' '.join(rng.choice(WORDS) for _ in range(80))
+        yield ('hyperkitty.email.{}'.format(number), 'hyperkitty.email',
+               number, text, {'mailinglist': 'klasse-{}a'.format(number % 6 + 1)})
+
+
+def main(maximum=100000, batch=1000):
+    maximum = int(maximum)
+    with tempfile.TemporaryDirectory() as directory:
+        index = FTSIndex(os.path.join(directory, 'index.sqlite3'))
+        size = 0
+        checkpoint = 1000
+        print('{:>9} {:>12} {:>12} {:>12}'.format(
+            'documents', 'index/batch', 'query', 'query merged'))
+        while size < maximum:
+            start = time.perf_counter()
+            index.write(documents(size, batch))
+            indexing = time.perf_counter() - start
+            size += batch
+            if size < checkpoint:
+                continue
+            checkpoint *= 10
+
+            start = time.perf_counter()
+            index.search_text('Elternabend Zeugnis')
+            query = time.perf_counter() - start
+            index.merge()
+            start = time.perf_counter()
+            index.search_text('Elternabend Zeugnis')
+            merged = time.perf_counter() - start
+            print('{:>9} {:>10.1f}ms {:>10.1f}ms {:>10.1f}ms'.format(
+                size, 1000 * indexing, 1000 * query, 1000 * merged))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
@@ -0,0 +1,127 @@
+"""Per-request latency of wsgi.application under different settings.
+
+Runs against a SQLite stand-in database, every request loads the session of
+the client (the login page reads request.user).
+
+Usage: python benchmarks/bench_wsgi.py [connections|sessions] [requests] [path]
+
+connections: with and without persistent database connections
+sessions:    database sessions with pickle vs. cached_db sessions with JSON
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BASE_DIR)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'settings_production')
+
+SCENARIOS = {
+    'connections': [
+        ('CONN_MAX_AGE=0', 0, {}),
+        ('CONN_MAX_AGE=600', 600, {}),
+    ],
+    'sessions': [
+        ('db + pickle', 600, {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+            'SESSION_SERIALIZER':
+                'django.contrib.sessions.serializers.PickleSerializer',
+        }),
+        ('cached_db + json', 600, {
+            'SESSION_ENGINE': 'django.contrib.sessions.backends.cached_db',
+            'SESSION_SERIALIZER': 'django.core.signing.JSONSerializer',
+        }),
+    ],
+}
+
+
+def setup(database):
+    from django.conf import settings
+    settings.DATABASES['default'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': database,
+        'CONN_HEALTH_CHECKS': True,
+    }
+    settings.CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+    settings.ALLOWED_HOSTS = ['localhost']
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+
+def create_session():
+    from importlib import import_module
+    from django.conf import settings
+    session = import_module(settings.SESSION_ENGINE).SessionStore()
+    session['bench'] = True
+    session.create()
+    return session.session_key
+
+
+def environ(path, session_key):
+    from django.conf import settings
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'HTTP_HOST': 'localhost',
+        'HTTP_COOKIE': '{}={}'.format(settings.SESSION_COOKIE_NAME, session_key),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+    }
+
+
+def run(count, path, conn_max_age, overrides):
+    from django.core.handlers.wsgi import WSGIHandler
+    from django.db import connections
+    from django.test.utils import override_settings
+
+    connections['default'].settings_dict['CONN_MAX_AGE'] = conn_max_age
+    connections['default'].close()
+
+    def start_response(status, headers, exc_info=None):
+        pass
+
+    with override_settings(**overrides):
+        # a new handler, the middleware reads the settings when it is loaded
+        application = WSGIHandler()
+        session_key = create_session()
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            response = application(environ(path, session_key), start_response)
+            b''.join(response)
+            response.close()
+            timings.append(time.perf_counter() - start)
+    timings.sort()
+    return timings
+
+
+def main(scenario='connections', count=500, path='/accounts/login/'):
+    count = int(count)
+    with tempfile.TemporaryDirectory() as directory:
+        setup(os.path.join(directory, 'bench.db'))
+        for name, conn_max_age, overrides in SCENARIOS[scenario]:
+            timings = run(count, path, conn_max_age, overrides)
+            print('{:<18} mean {:7.3f}ms  p50 {:7.3f}ms  p95 {:7.3f}ms'.format(
+                name,
+                1000 * sum(timings) / len(timings),
+                1000 * timings[len(timings) // 2],
+                1000 * timings[int(len(timings) * 0.95)]))
+
+
+if __name__ == '__main__':
+    main(*sys.argv[1:])
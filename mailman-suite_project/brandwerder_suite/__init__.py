@@ -0,0 +1,4 @@
+# Production helpers for the lists.brandwerder.de Postorius instance, enabled
+# by settings_production.
+
+default_app_config = 'brandwerder_suite.apps.BrandwerderSuiteConfig'
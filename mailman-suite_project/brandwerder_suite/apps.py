@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class BrandwerderSuiteConfig(AppConfig):
+    name = 'brandwerder_suite'
+    verbose_name = 'Brandwerder Suite'
+
+    def ready(self):
+        from . import db, metrics, rest_cache
+        db.connect_signals()
+        metrics.install()
+        rest_cache.install()
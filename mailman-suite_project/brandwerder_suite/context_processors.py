@@ -0,0 +1,54 @@
+"""Memoized versions of the expensive context processors.
+
+`common` (django_mailman3) only returns settings and the site name, its
+result is kept per host for CONTEXT_PROCESSOR_TTL seconds. `postorius`
+depends on the request and is computed once per request, however many
+templates the view renders.
+"""
+
+import time
+
+from django.conf import settings
+from django_mailman3.context_processors import common as _common
+from postorius.context_processors import postorius as _postorius
+
+_site_contexts = {}
+
+# keys of django_mailman3's `common` that do not depend on the user, a result
+# with any other key is not shared between requests
+SITE_CONTEXT_KEYS = frozenset((
+    'LOGIN_URL', 'LOGOUT_URL', 'INSTALLED_APPS', 'site_name'))
+
+
+def memoize_per_request(processor):
+    attribute = '_brandwerder_context_{}'.format(processor.__name__)
+
+    def wrapper(request):
+        context = getattr(request, attribute, None)
+        if context is None:
+            context = processor(request)
+            setattr(request, attribute, context)
+        return context
+    wrapper.__name__ = processor.__name__
+    return wrapper
+
+
+def memoize_per_site(processor):
+    def wrapper(request):
+        key = (processor.__name__, request.get_host())
+        now = time.monotonic()
+        cached = _site_contexts.get(key)
+        if cached is None or cached[0] < now:
+            context = processor(request)
+            if not SITE_CONTEXT_KEYS.issuperset(context):
+                return context
+            cached = (now + getattr(settings, 'CONTEXT_PROCESSOR_TTL', 60),
+                      context)
+            _site_contexts[key] = cached
+        return cached[1]
+    wrapper.__name__ = processor.__name__
+    return wrapper
+
+
+common = memoize_per_request(memoize_per_site(_common))
+postorius = memoize_per_request(_postorius)
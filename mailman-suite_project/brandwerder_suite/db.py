@@ -0,0 +1,23 @@
+import django
+
+from django.core.signals import request_started
+from django.db import connections
+
+
+def check_connections(**kwargs):
+    """Drop persistent connections the server closed in the meantime.
+
+    Only needed for Django < 4.1, newer versions do this on their own when
+    `CONN_HEALTH_CHECKS` is set.
+    """
+    for connection in connections.all():
+        if not connection.settings_dict.get('CONN_HEALTH_CHECKS'):
+            continue
+        if connection.connection is not None and not connection.is_usable():
+            connection.close()
+
+
+def connect_signals():
+    if django.VERSION < (4, 1):
+        request_started.connect(check_connections,
+                                dispatch_uid='brandwerder_suite.db')
@@ -0,0 +1,202 @@
+"""Full-text index in SQLite FTS5.
+
+Documents are kept in a plain table (id, content type, stored fields as JSON)
+and the text in an FTS5 table sharing the rowid. Automatic segment merging is
+switched off, so writes never pay for a merge; `merge()` is run from
+`manage.py fts_index merge` (e.g. by cron) instead.
+
+`IndexQueue` collects updates and removals and writes them in batches from a
+background thread, one transaction per batch.
+
+This module does not depend on Django, see search_backend for the haystack
+engine.
+"""
+
+import json
+import logging
+import queue
+import sqlite3
+import threading
+
+logger = logging.getLogger('postorius')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    django_ct TEXT NOT NULL,
+    django_id TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_django_ct ON documents (django_ct);
+CREATE VIRTUAL TABLE IF NOT EXISTS fts USING fts5(text, tokenize='unicode61');
+"""
+
+
+class FTSIndex:
+    def __init__(self, path, json_encoder=None, timeout=30):
+        self.path = path
+        self.json_encoder = json_encoder
+        self.timeout = timeout
+        self._local = threading.local()
+        with self.connection() as connection:
+            connection.executescript(SCHEMA)
+            # merging happens in merge(), not while documents are written
+            connection.execute(
+                "INSERT INTO fts (fts, rank) VALUES ('automerge', 0)")
+
+    def connection(self):
+        # one connection per thread
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            self._local.connection = connection
+        return connection
+
+    def close(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _delete(self, connection, ids):
+        rows = connection.execute(
+            'SELECT rowid FROM documents WHERE id IN ({})'.format(
+                ', '.join('?' * len(ids))), ids).fetchall()
+        connection.executemany('DELETE FROM fts WHERE rowid = ?', rows)
+        connection.executemany('DELETE FROM documents WHERE rowid = ?', rows)
+
+    def write(self, updates=(), removals=()):
+        """Write documents and remove ids in one transaction.
+
+        updates: iterable of (id, django_ct, django_id, text, data)
+        """
+        updates = list(updates)
+        ids = [update[0] for update in updates] + list(removals)
+        with self.connection() as connection:
+            for start in range(0, len(ids), 500):
+                self._delete(connection, ids[start:start + 500])
+            for id, django_ct, django_id, text, data in updates:
+                cursor = connection.execute(
+                    'INSERT INTO documents (id, django_ct, django_id, data) '
+                    'VALUES (?, ?, ?, ?)',
+                    (id, django_ct, str(django_id),
+                     json.dumps(data, cls=self.json_encoder)))
+                connection.execute(
+                    'INSERT INTO fts (rowid, text) VALUES (?, ?)',
+                    (cursor.lastrowid, text))
+
+    def clear(self, django_cts=None):
+        with self.connection() as connection:
+            if django_cts is None:
+                connection.execute('DELETE FROM fts')
+                connection.execute('DELETE FROM documents')
+                return
+            for django_ct in django_cts:
+                connection.execute(
+                    'DELETE FROM fts WHERE rowid IN '
+                    '(SELECT rowid FROM documents WHERE django_ct = ?)',
+                    (django_ct,))
+                connection.execute(
+                    'DELETE FROM documents WHERE django_ct = ?', (django_ct,))
+
+    def merge(self, pages=None):
+        # pages=None: merge all segments into one (FTS5 'optimize')
+        with self.connection() as connection:
+            if pages is None:
+                connection.execute("INSERT INTO fts (fts) VALUES ('optimize')")
+            else:
+                connection.execute(
+                    "INSERT INTO fts (fts, rank) VALUES ('merge', ?)", (pages,))
+
+    @staticmethod
+    def match_expression(text):
+        # every word as a quoted FTS5 string, all of them have to match
+        words = [word.replace('"', '""') for word in text.split()]
+        return ' '.join('"{}"'.format(word) for word in words if word)
+
+    def search(self, where='1', params=(), order_by='documents.rowid DESC',
+               order_params=(), limit=-1, offset=0):
+        """Return (hits, [(django_ct, django_id, data), ...]).
+
+        `where` is an SQL condition on `documents`, full-text conditions are
+        written as `documents.rowid IN (SELECT rowid FROM fts WHERE fts
+        MATCH ?)`.
+        """
+        connection = self.connection()
+        hits = connection.execute(
+            'SELECT count(*) FROM documents WHERE {}'.format(where),
+            params).fetchone()[0]
+        rows = connection.execute(
+            'SELECT django_ct, django_id, data FROM documents WHERE {} '
+            'ORDER BY {} LIMIT ? OFFSET ?'.format(where, order_by),
+            tuple(params) + tuple(order_params) + (limit, offset)).fetchall()
+        return hits, [(ct, id, json.loads(data)) for ct, id, data in rows]
+
+    def search_text(self, text, limit=20):
+        return self.search(
+            'documents.rowid IN (SELECT rowid FROM fts WHERE fts MATCH ?)',
+            (self.match_expression(text),), limit=limit)
+
+
+class IndexQueue:
+    """Writes queued updates and removals in batches from a thread."""
+
+    def __init__(self, index, batch_size=200, delay=1.0):
+        self.index = index
+        self.batch_size = batch_size
+        self.delay = delay
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name='fts-index-queue', daemon=True)
+                self._thread.start()
+
+    def update(self, documents):
+        for document in documents:
+            self._queue.put(('update', document))
+        self._start()
+
+    def remove(self, id):
+        self._queue.put(('remove', id))
+        self._start()
+
+    def join(self):
+        # wait until everything queued so far is written
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            try:
+                while len(items) < self.batch_size:
+                    items.append(self._queue.get(timeout=self.delay))
+            except queue.Empty:
+                pass
+
+            updates = {}
+            removals = set()
+            for operation, payload in items:
+                if operation == 'update':
+                    updates[payload[0]] = payload
+                    removals.discard(payload[0])
+                else:
+                    updates.pop(payload, None)
+                    removals.add(payload)
+            try:
+                self.index.write(updates.values(), removals)
+            except Exception:
+                # the batch is lost, the thread keeps writing the next ones
+                logger.exception(
+                    'fts index: %d updates and %d removals not written',
+                    len(updates), len(removals))
+            finally:
+                for _ in items:
+                    self._queue.task_done()
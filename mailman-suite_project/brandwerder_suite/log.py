@@ -0,0 +1,167 @@
+"""Logging off the request path.
+
+`QueueListenerHandler` puts the records into a queue, a listener thread hands
+them to the actual handlers (file, admin mail). The listener is started on the
+first record in every process, so it also works when the workers are forked
+from a preloaded master.
+
+`BatchingAdminEmailHandler` sends at most one mail per `interval` seconds and
+collects the errors in between into that mail, so a burst of 500s does not
+result in a burst of mails. Its report needs the traceback and the request,
+so it is rendered in the logging thread before the record is queued.
+"""
+
+import atexit
+import copy
+import logging
+import os
+import queue
+import threading
+import time
+
+from logging.handlers import QueueHandler, QueueListener
+
+from django.utils.log import AdminEmailHandler
+from django.utils.module_loading import import_string
+
+
+def build_handler(config):
+    config = dict(config)
+    factory = import_string(config.pop('class'))
+    level = config.pop('level', logging.NOTSET)
+    handler = factory(**config)
+    handler.setLevel(level)
+    return handler
+
+
+class QueueListenerHandler(QueueHandler):
+    def __init__(self, handlers):
+        super().__init__(queue.Queue(-1))
+        self.handlers = [build_handler(config) for config in handlers]
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # a fresh queue, a forked worker must not share the parent's
+            self.queue = queue.Queue(-1)
+            self._listener = QueueListener(
+                self.queue, *self.handlers, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+            atexit.register(self._stop)
+
+    def _stop(self):
+        # from atexit and close(), whichever comes first
+        with self._lock:
+            if self._listener is not None and self._pid == os.getpid():
+                self._listener.stop()
+                self._listener = None
+                self._pid = None
+
+    def setFormatter(self, fmt):
+        # the `formatter` of the handler config is set here by dictConfig,
+        # but the records are written by the inner handlers
+        super().setFormatter(fmt)
+        for handler in self.handlers:
+            if handler.formatter is None:
+                handler.setFormatter(fmt)
+
+    def prepare(self, record):
+        # unlike QueueHandler.prepare the traceback is kept for the handlers,
+        # handlers that need the request render their part now
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        for handler in self.handlers:
+            render = getattr(handler, 'render', None)
+            if render is not None and record.levelno >= handler.level:
+                render(record)
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start()
+        super().enqueue(record)
+
+    def close(self):
+        self._stop()
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+
+class BatchingAdminEmailHandler(AdminEmailHandler):
+    def __init__(self, interval=300, max_errors=100, **kwargs):
+        super().__init__(**kwargs)
+        self.interval = interval
+        self.max_errors = max_errors
+        self._errors = []
+        self._dropped = 0
+        self._last_sent = 0.0
+        self._timer = None
+        self._batch_lock = threading.Lock()
+        self._rendering = threading.local()
+
+    def render(self, record):
+        # runs AdminEmailHandler.emit in the logging thread, the mails it
+        # sends are kept with the record
+        self._rendering.mails = mails = []
+        try:
+            super().emit(record)
+        finally:
+            del self._rendering.mails
+        record.admin_mails = mails
+
+    def emit(self, record):
+        mails = getattr(record, 'admin_mails', None)
+        if mails is None:
+            return super().emit(record)
+        for subject, message, kwargs in mails:
+            self.send_mail(subject, message, **kwargs)
+
+    def send_mail(self, subject, message, *args, **kwargs):
+        mails = getattr(self._rendering, 'mails', None)
+        if mails is not None:
+            mails.append((subject, message, kwargs))
+            return
+        with self._batch_lock:
+            if len(self._errors) < self.max_errors:
+                self._errors.append((subject, message))
+            else:
+                self._dropped += 1
+            wait = self._last_sent + self.interval - time.monotonic()
+            if wait > 0 and self._timer is None:
+                # send the collected errors when the interval is over
+                self._timer = threading.Timer(wait, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if wait <= 0:
+            self.flush()
+
+    def flush(self):
+        with self._batch_lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._errors:
+                return
+            errors, dropped = self._errors, self._dropped
+            self._errors, self._dropped = [], 0
+            self._last_sent = time.monotonic()
+
+        subject = errors[0][0]
+        if len(errors) + dropped > 1:
+            subject = '[{} errors] {}'.format(len(errors) + dropped, subject)
+        message = '\n\n{}\n\n'.format('=' * 70).join(
+            message for _, message in errors)
+        if dropped:
+            message += '\n\n... and {} more errors'.format(dropped)
+        super().send_mail(subject, message, fail_silently=True)
+
+    def close(self):
+        self.flush()
+        super().close()
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ('Offline build of the static files: collect them into '
+            'STATIC_ROOT with hashed names, precompile LESS/SCSS and '
+            'compress the {% compress %} blocks. Every file gets '
+            'precompressed .gz/.br siblings.')
+
+    def handle(self, *args, **options):
+        if not getattr(settings, 'COMPRESS_OFFLINE', False):
+            raise CommandError('COMPRESS_OFFLINE is not enabled, use '
+                               'settings_production')
+        verbosity = options['verbosity']
+        call_command('collectstatic', interactive=False, verbosity=verbosity)
+        call_command('compress', force=True, verbosity=verbosity)
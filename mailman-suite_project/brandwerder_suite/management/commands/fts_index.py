@@ -0,0 +1,57 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from haystack import connections
+
+from brandwerder_suite import search_backend
+
+
+class Command(BaseCommand):
+    help = ('Maintain the SQLite FTS5 search index: `rebuild` streams all '
+            'documents in batches into a fresh index, `merge` merges the '
+            'index segments (run it from cron, not while serving requests).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('action', choices=['rebuild', 'merge'])
+        parser.add_argument('--using', default='default')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pages', type=int, default=None,
+            help='merge at most this many pages instead of everything')
+        parser.add_argument(
+            '--bulk', action='store_true',
+            help='run on the bulk django-q cluster instead of in this '
+                 'process')
+
+    def handle(self, action, using, batch_size, pages, bulk, **options):
+        backend = connections[using].get_backend()
+        if not hasattr(backend, 'merge'):
+            raise CommandError('{} is not a SQLite FTS5 index'.format(using))
+
+        if bulk:
+            from brandwerder_suite.tasks import async_bulk
+            if action == 'merge':
+                task = async_bulk(
+                    'brandwerder_suite.search_backend.merge', using, pages)
+            else:
+                task = async_bulk(
+                    'brandwerder_suite.search_backend.rebuild', using,
+                    batch_size)
+            self.stdout.write('queued as task {}'.format(task))
+            return
+
+        start = time.perf_counter()
+        if action == 'merge':
+            search_backend.merge(using, pages)
+            self.stdout.write('merged in {:.1f}s'.format(
+                time.perf_counter() - start))
+            return
+
+        counts = search_backend.rebuild(using, batch_size)
+        for label, count in counts.items():
+            self.stdout.write('{}: {} documents'.format(label, count))
+
+        total = sum(counts.values())
+        seconds = time.perf_counter() - start
+        self.stdout.write('{} documents in {:.1f}s ({:.0f}/s)'.format(
+            total, seconds, total / seconds if seconds else 0))
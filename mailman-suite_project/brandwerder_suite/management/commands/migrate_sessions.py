@@ -0,0 +1,28 @@
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = ('Re-encode the stored sessions with the current '
+            'SESSION_SERIALIZER, sessions that cannot be converted are '
+            'deleted.')
+
+    def handle(self, *args, **options):
+        store = SessionStore()
+        converted = deleted = 0
+        Session.objects.filter(expire_date__lt=timezone.now()).delete()
+        for session in Session.objects.iterator():
+            data = store.decode(session.session_data)
+            try:
+                session.session_data = store.encode(data)
+            except TypeError:
+                # not JSON serializable, the user has to log in again
+                session.delete()
+                deleted += 1
+                continue
+            session.save(update_fields=['session_data'])
+            converted += 1
+        self.stdout.write('{} sessions converted, {} deleted'.format(
+            converted, deleted))
@@ -0,0 +1,284 @@
+"""Request level performance metrics.
+
+`MetricsMiddleware` records per request the wall time, the number and time of
+the database queries and Mailman REST calls and the template render time.
+They are aggregated per view and served in the Prometheus text format at
+/brandwerder/metrics/ (from localhost only). With METRICS_SERVER_TIMING the
+numbers of the request are also sent in a `Server-Timing` header.
+
+Every worker process writes its totals to METRICS_DIR every few seconds, the
+metrics view adds up the files of all workers. A worker removes its file when
+it exits, files of killed workers are removed by the metrics view.
+"""
+
+import atexit
+import contextvars
+import json
+import os
+import threading
+import time
+
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template as DjangoTemplate
+
+try:
+    from mailmanclient.restbase.connection import Connection
+except ImportError:  # mailmanclient < 3.2
+    from mailmanclient._client import _Connection as Connection
+
+
+BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+FLUSH_INTERVAL = 5
+
+_current = contextvars.ContextVar('brandwerder_request_stats', default=None)
+
+
+class RequestStats:
+    __slots__ = ('db_count', 'db_time', 'rest_count', 'rest_time',
+                 'template_time', 'rendering')
+
+    def __init__(self):
+        self.db_count = 0
+        self.db_time = 0.0
+        self.rest_count = 0
+        self.rest_time = 0.0
+        self.template_time = 0.0
+        self.rendering = False
+
+
+class Registry:
+    """Totals per view of this process."""
+
+    def __init__(self):
+        self.views = {}
+        self._lock = threading.Lock()
+        self._flushed = 0.0
+        self._path = None
+
+    def add(self, view, status, seconds, stats):
+        with self._lock:
+            totals = self.views.setdefault(view, {
+                'requests': {}, 'buckets': [0] * len(BUCKETS), 'count': 0,
+                'seconds': 0.0, 'db_count': 0, 'db_time': 0.0,
+                'rest_count': 0, 'rest_time': 0.0, 'template_time': 0.0,
+            })
+            totals['requests'][status] = totals['requests'].get(status, 0) + 1
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    totals['buckets'][index] += 1
+            totals['count'] += 1
+            totals['seconds'] += seconds
+            totals['db_count'] += stats.db_count
+            totals['db_time'] += stats.db_time
+            totals['rest_count'] += stats.rest_count
+            totals['rest_time'] += stats.rest_time
+            totals['template_time'] += stats.template_time
+
+    def flush(self, force=False):
+        directory = getattr(settings, 'METRICS_DIR', None)
+        if directory is None or (
+                not force and time.monotonic() - self._flushed < FLUSH_INTERVAL):
+            return
+        with self._lock:
+            data = json.dumps(self.views)
+            self._flushed = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, '{}.json'.format(os.getpid()))
+        with open(path + '.tmp', 'w') as fp:
+            fp.write(data)
+        os.replace(path + '.tmp', path)
+        if self._path != path:
+            # the first flush of this process, maybe a forked worker
+            self._path = path
+            atexit.register(self.remove)
+
+    def remove(self):
+        # atexit and gunicorn's worker_exit hook
+        path, self._path = self._path, None
+        if path is not None and \
+                os.path.basename(path) == '{}.json'.format(os.getpid()):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+registry = Registry()
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def collect():
+    """The totals of all worker processes."""
+    registry.flush(force=True)
+    directory = getattr(settings, 'METRICS_DIR', None)
+    if directory is None:
+        return [registry.views]
+    processes = []
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        pid = filename[:-len('.json')]
+        if pid.isdigit() and not _alive(int(pid)):
+            # a worker that was killed before it could remove its file
+            try:
+                os.remove(os.path.join(directory, filename))
+            except FileNotFoundError:
+                pass
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as fp:
+                processes.append(json.load(fp))
+        except (OSError, ValueError):
+            continue
+    return processes
+
+
+def prometheus():
+    views = {}
+    for process in collect():
+        for view, totals in process.items():
+            merged = views.setdefault(view, {
+                'requests': {}, 'buckets': [0] * len(BUCKETS)})
+            for status, count in totals['requests'].items():
+                merged['requests'][status] = (
+                    merged['requests'].get(status, 0) + count)
+            merged['buckets'] = [
+                a + b for a, b in zip(merged['buckets'], totals['buckets'])]
+            for key in ('count', 'seconds', 'db_count', 'db_time',
+                        'rest_count', 'rest_time', 'template_time'):
+                merged[key] = merged.get(key, 0) + totals[key]
+
+    lines = [
+        '# TYPE brandwerder_requests_total counter',
+        '# TYPE brandwerder_request_duration_seconds histogram',
+        '# TYPE brandwerder_db_queries_total counter',
+        '# TYPE brandwerder_db_query_seconds_total counter',
+        '# TYPE brandwerder_rest_calls_total counter',
+        '# TYPE brandwerder_rest_call_seconds_total counter',
+        '# TYPE brandwerder_template_render_seconds_total counter',
+    ]
+    for view, totals in sorted(views.items()):
+        label = 'view="{}"'.format(view.replace('\\', '\\\\').replace('"', '\\"'))
+        for status, count in sorted(totals['requests'].items()):
+            lines.append('brandwerder_requests_total{{{},status="{}"}} {}'.format(
+                label, status, count))
+        for bound, count in zip(BUCKETS, totals['buckets']):
+            lines.append(
+                'brandwerder_request_duration_seconds_bucket{{{},le="{}"}} {}'.format(
+                    label, bound, count))
+        lines += [
+            'brandwerder_request_duration_seconds_bucket{{{},le="+Inf"}} {}'.format(
+                label, totals['count']),
+            'brandwerder_request_duration_seconds_sum{{{}}} {}'.format(
+                label, totals['seconds']),
+            'brandwerder_request_duration_seconds_count{{{}}} {}'.format(
+                label, totals['count']),
+            'brandwerder_db_queries_total{{{}}} {}'.format(label, totals['db_count']),
+            'brandwerder_db_query_seconds_total{{{}}} {}'.format(
+                label, totals['db_time']),
+            'brandwerder_rest_calls_total{{{}}} {}'.format(label, totals['rest_count']),
+            'brandwerder_rest_call_seconds_total{{{}}} {}'.format(
+                label, totals['rest_time']),
+            'brandwerder_template_render_seconds_total{{{}}} {}'.format(
+                label, totals['template_time']),
+        ]
+    return '\n'.join(lines) + '\n'
+
+
+def _database_timer(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_count += 1
+        stats.db_time += time.perf_counter() - start
+
+
+def _timed_rest_call(call):
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        if stats is None:
+            return call(self, *args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return call(self, *args, **kwargs)
+        finally:
+            stats.rest_count += 1
+            stats.rest_time += time.perf_counter() - start
+    wrapper.brandwerder_timed = True
+    return wrapper
+
+
+def _timed_render(render):
+    def wrapper(self, *args, **kwargs):
+        stats = _current.get()
+        # only the outermost render, included templates are part of it
+        if stats is None or stats.rendering:
+            return render(self, *args, **kwargs)
+        stats.rendering = True
+        start = time.perf_counter()
+        try:
+            return render(self, *args, **kwargs)
+        finally:
+            stats.rendering = False
+            stats.template_time += time.perf_counter() - start
+    wrapper.brandwerder_timed = True
+    return wrapper
+
+
+def install():
+    # before rest_cache.install(), so that cached REST reads are not counted
+    if not getattr(Connection.call, 'brandwerder_timed', False):
+        Connection.call = _timed_rest_call(Connection.call)
+    if not getattr(DjangoTemplate.render, 'brandwerder_timed', False):
+        DjangoTemplate.render = _timed_render(DjangoTemplate.render)
+
+
+class MetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.server_timing = getattr(settings, 'METRICS_SERVER_TIMING', False)
+
+    def __call__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(
+                        connection.execute_wrapper(_database_timer))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        seconds = time.perf_counter() - start
+
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unresolved'
+        registry.add(view, str(response.status_code), seconds, stats)
+        registry.flush()
+
+        if self.server_timing:
+            response['Server-Timing'] = ', '.join([
+                'db;dur={:.1f};desc="{} queries"'.format(
+                    1000 * stats.db_time, stats.db_count),
+                'rest;dur={:.1f};desc="{} calls"'.format(
+                    1000 * stats.rest_time, stats.rest_count),
+                'tpl;dur={:.1f}'.format(1000 * stats.template_time),
+                'total;dur={:.1f}'.format(1000 * seconds),
+            ])
+        return response
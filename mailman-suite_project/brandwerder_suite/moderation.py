@@ -0,0 +1,34 @@
+"""Bulk moderation of held subscription requests.
+
+Uses the REST resource of the brandwerder plugin
+(/<api>/plugins/brandwerder_plugin/lists/<list_id>/requests), which accepts,
+rejects or discards any number of requests in one Mailman transaction.
+"""
+
+from django_mailman3.lib.mailman import get_mailman_client
+
+ACTIONS = ('accept', 'reject', 'discard')
+PLUGIN_PATH = 'plugins/brandwerder_plugin/lists/{}/{}'
+
+
+def _call(list_id, name, data=None, method=None):
+    connection = get_mailman_client()._connection
+    response, content = connection.call(
+        PLUGIN_PATH.format(list_id, name), data, method)
+    return content
+
+
+def held_requests(list_id):
+    return _call(list_id, 'requests').get('entries', [])
+
+
+def moderate(list_id, action, tokens, reason=None):
+    """Moderate the requests with the given tokens (all for tokens=None)."""
+    data = {'action': action}
+    if tokens is not None:
+        if not tokens:
+            raise ValueError('no tokens given')
+        data['token'] = list(tokens)
+    if reason:
+        data['reason'] = reason
+    return _call(list_id, 'requests', data, 'POST')
@@ -0,0 +1,71 @@
+"""Short-lived caching of Mailman REST reads.
+
+Postorius asks the Mailman REST API for the list index and the list details on
+every page view. The GET requests for list resources are cached in the default
+cache for `MAILMAN_REST_CACHE_TTL` seconds. Every write through the client and
+every call of `invalidate()` (see views.invalidate_rest_cache, called by the
+brandwerder plugin when lists are created or deleted) bumps a version number,
+which invalidates all cached entries at once.
+"""
+
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+try:
+    from mailmanclient.restbase.connection import Connection
+except ImportError:  # mailmanclient < 3.2
+    from mailmanclient._client import _Connection as Connection
+
+
+VERSION_KEY = 'brandwerder:rest:version'
+CACHED_PATHS = re.compile(r'(^|/)lists(/[^/?]+)?/?(\?.*)?$')
+INVALIDATING_PATHS = re.compile(r'(^|/)(lists|domains)(/|$)')
+
+
+def version():
+    return cache.get_or_set(VERSION_KEY, 1, None)
+
+
+def invalidate():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def cache_key(connection, path):
+    url = path if path.startswith('http') else connection.baseurl + path
+    digest = hashlib.sha1(url.encode('utf-8')).hexdigest()
+    return 'brandwerder:rest:{}:{}'.format(version(), digest)
+
+
+def cached(call):
+    def wrapper(self, path, data=None, method=None, **kwargs):
+        if data is not None or (method or 'GET').upper() != 'GET':
+            result = call(self, path, data, method, **kwargs)
+            if INVALIDATING_PATHS.search(path):
+                invalidate()
+            return result
+
+        if kwargs or not CACHED_PATHS.search(path):
+            return call(self, path, data, method, **kwargs)
+
+        key = cache_key(self, path)
+        result = cache.get(key)
+        if result is None:
+            result = call(self, path, data, method)
+            cache.set(key, result, settings.MAILMAN_REST_CACHE_TTL)
+        return result
+
+    wrapper.brandwerder_cached = True
+    return wrapper
+
+
+def install():
+    if getattr(settings, 'MAILMAN_REST_CACHE_TTL', 0) <= 0:
+        return
+    if not getattr(Connection.call, 'brandwerder_cached', False):
+        Connection.call = cached(Connection.call)
@@ -0,0 +1,236 @@
+"""Haystack engine for the SQLite FTS5 index in brandwerder_suite.fts.
+
+HAYSTACK_CONNECTIONS options:
+
+PATH        directory of the index
+QUEUE       write updates from a background queue (default True)
+BATCH_SIZE  documents per transaction of the queue (default 200)
+"""
+
+import datetime
+import os
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from haystack import connections
+from haystack.backends import (
+    BaseEngine, BaseSearchBackend, BaseSearchQuery, SearchNode, log_query)
+from haystack.constants import DJANGO_CT, DJANGO_ID, ID
+from haystack.exceptions import SearchBackendError
+from haystack.inputs import BaseInput
+from haystack.models import SearchResult
+from haystack.utils import get_identifier, get_model_ct
+
+from .fts import FTSIndex, IndexQueue
+
+# one index and queue per index path, haystack creates a backend per query
+_indexes = {}
+
+COMPARISONS = {
+    'exact': '=',
+    'content': '=',
+    'gt': '>',
+    'gte': '>=',
+    'lt': '<',
+    'lte': '<=',
+}
+
+
+def prepare_value(value):
+    # stored and compared as the same string: datetimes in UTC without an
+    # offset, naive ones are in TIME_ZONE like Django's
+    if isinstance(value, (list, tuple, set)):
+        return [prepare_value(item) for item in value]
+    if isinstance(value, datetime.datetime):
+        if settings.USE_TZ and timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        if timezone.is_aware(value):
+            value = timezone.make_naive(value, datetime.timezone.utc)
+        return value.isoformat()
+    if isinstance(value, datetime.date):
+        return value.isoformat()
+    return value
+
+
+def like_pattern(value, prefix='', suffix=''):
+    value = str(value).replace('\\', '\\\\')
+    value = value.replace('%', '\\%').replace('_', '\\_')
+    return prefix + value + suffix
+
+
+def get_index(path, batch_size):
+    if path not in _indexes:
+        os.makedirs(path, exist_ok=True)
+        index = FTSIndex(os.path.join(path, 'index.sqlite3'),
+                         json_encoder=DjangoJSONEncoder)
+        _indexes[path] = (index, IndexQueue(index, batch_size=batch_size))
+    return _indexes[path]
+
+
+class SQLiteFTSSearchBackend(BaseSearchBackend):
+    def __init__(self, connection_alias, **connection_options):
+        super().__init__(connection_alias, **connection_options)
+        self.index, self.queue = get_index(
+            connection_options['PATH'],
+            connection_options.get('BATCH_SIZE', 200))
+        self.queued = connection_options.get('QUEUE', True)
+
+    def documents(self, index, iterable):
+        content_field = index.get_content_field()
+        for obj in iterable:
+            prepared = index.full_prepare(obj)
+            text = prepared.pop(content_field, '') or ''
+            data = {key: prepare_value(value)
+                    for key, value in prepared.items()
+                    if key not in (ID, DJANGO_CT, DJANGO_ID)}
+            yield (prepared[ID], prepared[DJANGO_CT], prepared[DJANGO_ID],
+                   text, data)
+
+    def update(self, index, iterable, commit=True, queued=None):
+        documents = self.documents(index, iterable)
+        if self.queued if queued is None else queued:
+            self.queue.update(documents)
+        else:
+            self.index.write(documents)
+
+    def remove(self, obj_or_string, commit=True):
+        if self.queued:
+            self.queue.remove(get_identifier(obj_or_string))
+        else:
+            self.index.write(removals=[get_identifier(obj_or_string)])
+
+    def clear(self, models=None, commit=True):
+        self.queue.join()
+        if models is None:
+            self.index.clear()
+        else:
+            self.index.clear([get_model_ct(model) for model in models])
+
+    def merge(self, pages=None):
+        self.queue.join()
+        self.index.merge(pages)
+
+    @log_query
+    def search(self, query_string, sort_by=None, start_offset=0,
+               end_offset=None, models=None, result_class=None, **kwargs):
+        where, params = query_string
+        params = list(params)
+        if models:
+            cts = [get_model_ct(model) for model in models]
+            where = '({}) AND documents.django_ct IN ({})'.format(
+                where, ', '.join('?' * len(cts)))
+            params += cts
+
+        order_by = []
+        order_params = []
+        for field in sort_by or ():
+            direction = 'DESC' if field.startswith('-') else 'ASC'
+            order_by.append('json_extract(documents.data, ?) {}'.format(direction))
+            order_params.append('$.' + field.lstrip('-'))
+        order_by.append('documents.rowid DESC')
+
+        limit = -1 if end_offset is None else end_offset - start_offset
+        hits, rows = self.index.search(
+            where, params, ', '.join(order_by), order_params, limit,
+            start_offset)
+
+        result_class = result_class or SearchResult
+        results = []
+        for django_ct, django_id, data in rows:
+            app_label, model_name = django_ct.split('.')
+            results.append(
+                result_class(app_label, model_name, django_id, 0, **data))
+        return {'results': results, 'hits': hits}
+
+
+class SQLiteFTSSearchQuery(BaseSearchQuery):
+    def build_query(self):
+        # (where, params) for SQLiteFTSSearchBackend.search
+        return self.compile(self.query_filter)
+
+    def compile(self, node):
+        parts = []
+        params = []
+        for child in node.children:
+            if isinstance(child, SearchNode):
+                sql, child_params = self.compile(child)
+            else:
+                expression, value = child
+                field, filter_type = node.split_expression(expression)
+                sql, child_params = self.condition(field, filter_type, value)
+            parts.append(sql)
+            params += child_params
+
+        sql = ' {} '.format(node.connector).join(parts) or '1'
+        if node.negated:
+            sql = 'NOT ({})'.format(sql)
+        return '({})'.format(sql), params
+
+    def condition(self, field, filter_type, value):
+        if isinstance(value, BaseInput):
+            value = value.query_string
+
+        if field == 'content':
+            return ('documents.rowid IN (SELECT rowid FROM fts WHERE fts MATCH ?)',
+                    [FTSIndex.match_expression(str(value))])
+
+        column = 'json_extract(documents.data, ?)'
+        path = '$.' + field
+        like = "{} LIKE ? ESCAPE '\\'".format(column)
+        if filter_type == 'in':
+            values = prepare_value(list(value))
+            return ('{} IN ({})'.format(column, ', '.join('?' * len(values))),
+                    [path] + values)
+        if filter_type == 'contains':
+            return like, [path, like_pattern(value, '%', '%')]
+        if filter_type == 'startswith':
+            return like, [path, like_pattern(value, suffix='%')]
+        if filter_type == 'endswith':
+            return like, [path, like_pattern(value, '%')]
+        if filter_type == 'range':
+            start, end = prepare_value(list(value))
+            return '{0} >= ? AND {0} <= ?'.format(column), [path, start, path, end]
+        if filter_type not in COMPARISONS:
+            # e.g. fuzzy, only the content field is searched as text
+            raise SearchBackendError(
+                'filter {!r} is not supported on {!r}'.format(filter_type, field))
+        return ('{} {} ?'.format(column, COMPARISONS[filter_type]),
+                [path, prepare_value(value)])
+
+
+class SQLiteFTSEngine(BaseEngine):
+    backend = SQLiteFTSSearchBackend
+    query = SQLiteFTSSearchQuery
+
+
+def rebuild(using='default', batch_size=1000):
+    """Write all documents into a cleared index, in batches of `batch_size`.
+
+    Run by `manage.py fts_index rebuild`, directly or as a bulk task. Returns
+    the number of documents per model label.
+    """
+    backend = connections[using].get_backend()
+    backend.clear()
+    counts = {}
+    unified_index = connections[using].get_unified_index()
+    for model in unified_index.get_indexed_models():
+        index = unified_index.get_index(model)
+        count = 0
+        batch = []
+        for obj in index.build_queryset(using=using).iterator():
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                backend.update(index, batch, queued=False)
+                count += len(batch)
+                batch = []
+        if batch:
+            backend.update(index, batch, queued=False)
+            count += len(batch)
+        counts[model._meta.label] = count
+    backend.merge()
+    return counts
+
+
+def merge(using='default', pages=None):
+    connections[using].get_backend().merge(pages)
@@ -0,0 +1,17 @@
+import pickle
+
+from django.core.signing import JSONSerializer
+
+
+class JSONPickleFallbackSerializer(JSONSerializer):
+    """Writes JSON, but still reads the pickled sessions written before.
+
+    Only meant for the time until `manage.py migrate_sessions` was run, after
+    that SESSION_SERIALIZER should be the plain JSONSerializer.
+    """
+
+    def loads(self, data):
+        # pickle protocol 2+ starts with the PROTO opcode, JSON with `{`
+        if data[:1] == pickle.PROTO:
+            return pickle.loads(data)
+        return super().loads(data)
@@ -0,0 +1,72 @@
+"""Static files storages writing precompressed `.gz` and `.br` siblings.
+
+The web server can then deliver the hashed files directly (nginx:
+`gzip_static on; brotli_static on; expires max;`). Brotli needs the `brotli`
+package, without it only `.gz` files are written.
+"""
+
+import gzip
+import os
+
+from compressor.storage import CompressorFileStorage
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class PrecompressMixin:
+    precompress_extensions = (
+        '.css', '.js', '.map', '.svg', '.json', '.txt', '.xml', '.html',
+        '.ico', '.eot', '.otf', '.ttf')
+    precompress_min_size = 256
+
+    def _write_sibling(self, path, data):
+        # write the sibling atomically, the old one may be served right now
+        with open(path + '.tmp', 'wb') as fp:
+            fp.write(data)
+        os.replace(path + '.tmp', path)
+
+    def precompress(self, name):
+        if not name.endswith(self.precompress_extensions):
+            return
+        path = self.path(name)
+        with open(path, 'rb') as fp:
+            data = fp.read()
+        if len(data) < self.precompress_min_size:
+            return
+
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        if len(compressed) < len(data):
+            self._write_sibling(path + '.gz', compressed)
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            if len(compressed) < len(data):
+                self._write_sibling(path + '.br', compressed)
+
+
+class PrecompressedManifestStaticFilesStorage(PrecompressMixin,
+                                              ManifestStaticFilesStorage):
+    def post_process(self, paths, dry_run=False, **options):
+        # a file can be rewritten (and renamed) in every pass, only its final
+        # version is compressed, once all passes are done
+        final = {}
+        for name, hashed_name, processed in super().post_process(
+                paths, dry_run, **options):
+            if hashed_name and not isinstance(processed, Exception):
+                final[name] = hashed_name
+            yield name, hashed_name, processed
+        if not dry_run:
+            for hashed_name in set(final.values()):
+                self.precompress(hashed_name)
+
+
+class PrecompressedCompressorFileStorage(PrecompressMixin,
+                                         CompressorFileStorage):
+    # output of `manage.py compress`, the names already contain a hash
+    def _save(self, name, content):
+        name = super()._save(name, content)
+        self.precompress(name)
+        return name
@@ -0,0 +1,109 @@
+"""Interactive and bulk django-q queues with queue-depth and latency metrics.
+
+Interactive tasks (user triggered, e.g. a single subscription) run on the
+default cluster, bulk tasks (e.g. `manage.py fts_index rebuild --bulk`) on the
+`bulk` cluster from Q_CLUSTER['ALT_CLUSTERS'], started with
+
+    Q_CLUSTER_NAME=bulk python manage.py qcluster
+
+`async_bulk()` records the time a task waited in the queue and its run time.
+The statistics are counters in the shared cache, updated with `cache.incr()`,
+which is atomic with Redis or memcached as cache backend.
+"""
+
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+from django_q.brokers import get_broker
+from django_q.tasks import async_task
+
+BULK = 'bulk'
+STATS_TIMEOUT = 24 * 60 * 60
+# upper bounds in seconds of the wait and run time histograms
+BUCKETS = (0.1, 0.5, 1.0, 5.0, 30.0, 60.0, 300.0, 1800.0)
+
+
+def interactive_cluster():
+    return settings.Q_CLUSTER.get('name', 'default')
+
+
+def stats_key(cluster, name):
+    return 'brandwerder:taskstats:{}:{}'.format(cluster, name)
+
+
+def incr(key, delta=1):
+    # add() does not overwrite a counter written by another worker
+    cache.add(key, 0, STATS_TIMEOUT)
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        # expired between add() and incr()
+        cache.set(key, delta, STATS_TIMEOUT)
+
+
+def async_bulk(func, *args, **kwargs):
+    # the task name is the cache key, written before a worker can pick up
+    # the task and run the hook
+    name = kwargs.pop('task_name', None) or uuid.uuid4().hex
+    cache.set('brandwerder:task:{}'.format(name),
+              (BULK, timezone.now()), STATS_TIMEOUT)
+    kwargs['task_name'] = name
+    kwargs['hook'] = 'brandwerder_suite.tasks.record_latency'
+    kwargs['cluster'] = BULK
+    return async_task(func, *args, **kwargs)
+
+
+def record_latency(task):
+    # django-q hook, runs in the cluster after the task finished
+    key = 'brandwerder:task:{}'.format(task.name)
+    enqueued = cache.get(key)
+    if enqueued is None:
+        return
+    cache.delete(key)
+    cluster, enqueued_at = enqueued
+
+    incr(stats_key(cluster, 'count'))
+    if not task.success:
+        incr(stats_key(cluster, 'failed'))
+    for name, seconds in (
+            ('wait', (task.started - enqueued_at).total_seconds()),
+            ('run', (task.stopped - task.started).total_seconds())):
+        incr(stats_key(cluster, name + '_ms'), int(seconds * 1000))
+        bucket = next(
+            (bound for bound in BUCKETS if seconds <= bound), '+Inf')
+        incr(stats_key(cluster, '{}_le_{}'.format(name, bucket)))
+
+
+def histogram(stats, cluster, name):
+    # cumulative like a Prometheus histogram, {upper bound: tasks}
+    result = {}
+    total = 0
+    for bound in BUCKETS + ('+Inf',):
+        total += stats.get(
+            stats_key(cluster, '{}_le_{}'.format(name, bound)), 0)
+        result[str(bound)] = total
+    return result
+
+
+def metrics():
+    """Queue depth and task latencies of the interactive and bulk cluster."""
+    result = {}
+    for cluster in (interactive_cluster(), BULK):
+        names = ['count', 'failed', 'wait_ms', 'run_ms'] + [
+            '{}_le_{}'.format(name, bound)
+            for name in ('wait', 'run') for bound in BUCKETS + ('+Inf',)]
+        stats = cache.get_many([stats_key(cluster, name) for name in names])
+        count = stats.get(stats_key(cluster, 'count'), 0)
+        result[cluster] = {
+            'queue_depth': get_broker(list_key=cluster).queue_size(),
+            'tasks': count,
+            'failed': stats.get(stats_key(cluster, 'failed'), 0),
+        }
+        for name in ('wait', 'run'):
+            total = stats.get(stats_key(cluster, name + '_ms'), 0) / 1000
+            result[cluster][name + '_avg'] = total / count if count else 0.0
+            result[cluster][name + '_buckets'] = histogram(
+                stats, cluster, name)
+    return result
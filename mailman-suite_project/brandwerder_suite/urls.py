@@ -0,0 +1,14 @@
+from django.conf.urls import url
+
+from . import views
+
+urlpatterns = [
+    url(r'^rest-cache/invalidate/$', views.invalidate_rest_cache,
+        name='brandwerder_invalidate_rest_cache'),
+    url(r'^metrics/$', views.metrics, name='brandwerder_metrics'),
+    url(r'^metrics/tasks/$', views.task_metrics,
+        name='brandwerder_task_metrics'),
+    url(r'^lists/(?P<list_id>[^/]+)/subscription_requests/$',
+        views.subscription_requests,
+        name='brandwerder_subscription_requests'),
+]
@@ -0,0 +1,77 @@
+from urllib.error import HTTPError
+
+from django.conf import settings
+from django.contrib import messages
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponse, HttpResponseForbidden, JsonResponse
+from django.shortcuts import redirect, render
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from postorius.auth.decorators import list_moderator_required
+from postorius.models import List
+
+from . import rest_cache
+
+
+def is_local(request, setting='MAILMAN_ARCHIVER_FROM'):
+    allowed = getattr(settings, setting, ('127.0.0.1', '::1'))
+    return request.META.get('REMOTE_ADDR') in allowed
+
+
+@csrf_exempt
+@require_POST
+def invalidate_rest_cache(request):
+    # Called by Mailman Core (brandwerder_plugin) when lists change.
+    if not is_local(request, 'MAILMAN_REST_CACHE_INVALIDATE_FROM'):
+        return HttpResponseForbidden()
+    rest_cache.invalidate()
+    return HttpResponse(status=204)
+
+
+def task_metrics(request):
+    if not is_local(request):
+        return HttpResponseForbidden()
+    from . import tasks
+    return JsonResponse(tasks.metrics())
+
+
+def metrics(request):
+    if not is_local(request):
+        return HttpResponseForbidden()
+    from . import metrics
+    return HttpResponse(metrics.prometheus(),
+                        content_type='text/plain; version=0.0.4')
+
+
+@login_required
+@list_moderator_required
+def subscription_requests(request, list_id):
+    # all held subscription requests of a list on one page, handled at once
+    from . import moderation
+
+    if request.method == 'POST':
+        action = request.POST.get('action')
+        tokens = request.POST.getlist('token')
+        if action not in moderation.ACTIONS or not tokens:
+            messages.error(request, 'Bitte Anfragen und eine Aktion auswählen.')
+            return redirect('brandwerder_subscription_requests', list_id=list_id)
+        try:
+            result = moderation.moderate(
+                list_id, action, tokens, request.POST.get('reason'))
+        except HTTPError as error:
+            messages.error(request, 'Fehler in Mailman: {}'.format(error))
+        else:
+            messages.success(request, '{} Anfragen bearbeitet.'.format(
+                len(result['done'])))
+            if result['failed']:
+                messages.warning(
+                    request, '{} Anfragen nicht bearbeitet: {}'.format(
+                        len(result['failed']), ', '.join(
+                            '{} ({})'.format(token, reason)
+                            for token, reason in result['failed'].items())))
+        return redirect('brandwerder_subscription_requests', list_id=list_id)
+
+    return render(request, 'brandwerder_suite/subscription_requests.html', {
+        'list': List.objects.get_or_404(fqdn_listname=list_id),
+        'requests': moderation.held_requests(list_id),
+    })
@@ -0,0 +1,104 @@
+"""Warm-up of a preloaded WSGI application.
+
+`warm_up()` runs once in the master before the workers are forked: it imports
+the url confs with all views, loads the translations and compiles the
+templates, so the forked workers share this memory copy-on-write. Database
+connections and the Mailman REST client must not be shared between
+processes, `warm_up_worker()` sets them up in every worker after the fork.
+"""
+
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.urls import get_resolver
+from django.utils import translation
+
+logger = logging.getLogger('postorius')
+
+
+def template_names(directory):
+    for root, dirs, files in os.walk(directory):
+        for filename in files:
+            if filename.endswith(('.html', '.txt', '.xml')):
+                yield os.path.relpath(os.path.join(root, filename), directory)
+
+
+def loader_dirs(loader):
+    # the template directories of a loader, the cached loader wraps others
+    if hasattr(loader, 'loaders'):
+        for inner in loader.loaders:
+            yield from loader_dirs(inner)
+    elif hasattr(loader, 'get_dirs'):
+        yield from loader.get_dirs()
+
+
+def compile_templates():
+    # walks the directories of the configured loaders, settings_production
+    # lists them explicitly instead of APP_DIRS
+    count = 0
+    for engine in engines.all():
+        if not isinstance(engine, DjangoTemplates):
+            continue
+        directories = []
+        for loader in engine.engine.template_loaders:
+            for directory in loader_dirs(loader):
+                if str(directory) not in directories:
+                    directories.append(str(directory))
+        for directory in directories:
+            for name in template_names(directory):
+                try:
+                    engine.get_template(name)
+                except Exception:
+                    # e.g. templates of apps that are not installed
+                    continue
+                count += 1
+    return count
+
+
+def connect(connection):
+    # the application still boots with the database down, Django connects
+    # again on the first query
+    try:
+        connection.ensure_connection()
+    except OperationalError as error:
+        logger.warning('warm-up: database %s not reachable: %s',
+                       connection.alias, error)
+
+
+def warm_up():
+    start = time.perf_counter()
+    # resolving imports urls.py, the postorius, allauth and django_mailman3
+    # url confs and their views
+    resolver = get_resolver()
+    resolver.resolve('/')
+    patterns = len(resolver.reverse_dict)
+
+    translation.activate(settings.LANGUAGE_CODE)
+    translation.deactivate()
+
+    templates = compile_templates()
+    if not templates:
+        logger.warning('warm-up: no templates compiled, check the loaders')
+
+    # load the database driver, the connection itself is opened per worker
+    for connection in connections.all():
+        connect(connection)
+        connection.close()
+
+    logger.info('warm-up: %d url patterns, %d templates in %.2fs',
+                patterns, templates, time.perf_counter() - start)
+
+
+def warm_up_worker():
+    for connection in connections.all():
+        connect(connection)
+    try:
+        from django_mailman3.lib.mailman import get_mailman_client
+        get_mailman_client().system
+    except Exception as error:
+        logger.warning('warm-up: Mailman REST API not reachable: %s', error)
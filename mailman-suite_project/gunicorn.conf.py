@@ -0,0 +1,20 @@
+# gunicorn configuration for lists.brandwerder.de
+#
+#   gunicorn -c gunicorn.conf.py
+
+wsgi_app = 'wsgi_production:application'
+bind = '127.0.0.1:8000'
+workers = 4
+
+# import and warm up the application in the master, the workers share it
+preload_app = True
+
+
+def post_fork(server, worker):
+    from brandwerder_suite.warmup import warm_up_worker
+    warm_up_worker()
+
+
+def worker_exit(server, worker):
+    from brandwerder_suite.metrics import registry
+    registry.remove()
@@ -175,6 +175,16 @@ DATABASES = {
     #}
 }
 
+# Connection pooling for settings_production, requires
+# django-db-connection-pool (https://pypi.org/project/django-db-connection-pool/)
+DATABASE_POOL = False
+DATABASE_POOL_OPTIONS = {
+    'POOL_SIZE': 5,
+    'MAX_OVERFLOW': 5,
+    'RECYCLE': 3600,
+    'PRE_PING': True,
+}
+
 # If you're behind a proxy, use the X-Forwarded-Host header
 # See https://docs.djangoproject.com/en/1.8/ref/settings/#use-x-forwarded-host
 # USE_X_FORWARDED_HOST = True
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Production settings for lists.brandwerder.de
+
+Use with DJANGO_SETTINGS_MODULE=settings_production. Everything not set here
+is taken from settings.py (and settings_local.py).
+"""
+
+import copy
+
+from django.core.exceptions import ImproperlyConfigured
+
+from settings import *  # flake8: noqa
+
+# copies, the settings module itself stays unchanged
+DATABASES = copy.deepcopy(DATABASES)
+TEMPLATES = copy.deepcopy(TEMPLATES)
+LOGGING = copy.deepcopy(LOGGING)
+
+DEBUG = False
+
+# settings.py writes the mails into files when DEBUG is on, DEBUG = False
+# here does not undo that
+EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
+
+INSTALLED_APPS += (
+    'compressor',
+    'django_q',
+    'brandwerder_suite',
+)
+
+# Request metrics (brandwerder_suite.metrics), first to see the whole request
+MIDDLEWARE = ('brandwerder_suite.metrics.MetricsMiddleware',) + MIDDLEWARE
+METRICS_DIR = os.path.join(BASE_DIR, 'metrics')
+# Send the timings of each request in a `Server-Timing` header
+METRICS_SERVER_TIMING = False
+
+
+#
+# Database
+#
+# Keep connections open between requests, so that neither ~/.my.cnf is read
+# nor `SET sql_mode` is run for every request. Connections are checked before
+# they are reused (see brandwerder_suite.db for Django < 4.1).
+DATABASES['default']['CONN_MAX_AGE'] = 600
+DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+
+# Optional connection pooling (DATABASE_POOL in settings.py), a pool replaces
+# the persistent connection of each worker.
+if DATABASE_POOL:
+    try:
+        import dj_db_conn_pool  # flake8: noqa
+    except ImportError:
+        raise ImproperlyConfigured(
+            'DATABASE_POOL needs django-db-connection-pool[mysql]')
+    DATABASES['default']['ENGINE'] = 'dj_db_conn_pool.backends.mysql'
+    DATABASES['default']['POOL_OPTIONS'] = DATABASE_POOL_OPTIONS
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+
+
+#
+# Templates
+#
+# Compiled templates are cached per process, the DEBUG context processor is
+# left out and the django_mailman3/postorius context processors are memoized
+# (see brandwerder_suite.context_processors).
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    'django.template.context_processors.i18n',
+    'django.template.context_processors.media',
+    'django.template.context_processors.static',
+    'django.template.context_processors.tz',
+    'django.template.context_processors.csrf',
+    'django.template.context_processors.request',
+    'django.contrib.auth.context_processors.auth',
+    'django.contrib.messages.context_processors.messages',
+    'brandwerder_suite.context_processors.common',
+    'brandwerder_suite.context_processors.postorius',
+]
+# Seconds the site dependent context is reused.
+CONTEXT_PROCESSOR_TTL = 60
+
+
+#
+# Static files
+#
+# Built offline by `manage.py build_static` after every upgrade: hashed file
+# names and precompressed .gz/.br siblings, so the web server can deliver
+# them with far-future expiry headers without asking Django.
+STATICFILES_STORAGE = (
+    'brandwerder_suite.storage.PrecompressedManifestStaticFilesStorage')
+COMPRESS_ENABLED = True
+COMPRESS_OFFLINE = True
+COMPRESS_STORAGE = (
+    'brandwerder_suite.storage.PrecompressedCompressorFileStorage')
+
+
+#
+# Sessions
+#
+# Sessions are read from the cache and only written through to the database.
+# JSON instead of pickle (django-openid is not used), the fallback serializer
+# still reads the old pickled sessions. Once `manage.py migrate_sessions` was
+# run it can be replaced by 'django.core.signing.JSONSerializer'.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+SESSION_SERIALIZER = 'brandwerder_suite.sessions.JSONPickleFallbackSerializer'
+# Alternatively keep the sessions in signed cookies, without any database
+# access (logs out all users when switching):
+# SESSION_ENGINE = 'django.contrib.sessions.backends.signed_cookies'
+# SESSION_SERIALIZER = 'django.core.signing.JSONSerializer'
+
+
+#
+# Cache
+#
+# A cache shared by all workers. For Redis use e.g.
+#    'BACKEND': 'django_redis.cache.RedisCache',
+#    'LOCATION': 'redis://127.0.0.1:6379/1',
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'TIMEOUT': 300,
+    }
+}
+
+# Seconds the list index and list details from the Mailman REST API are
+# cached (brandwerder_suite.rest_cache), 0 disables the cache.
+MAILMAN_REST_CACHE_TTL = 30
+# Addresses of the Mailman Core hosts allowed to invalidate that cache.
+MAILMAN_REST_CACHE_INVALIDATE_FROM = ('127.0.0.1', '::1')
+
+
+#
+# Logging
+#
+# File writes and admin mails happen in a listener thread instead of the
+# request thread. Error mails are sent at most every 5 minutes, the errors in
+# between are collected into that mail.
+LOGGING['handlers'].update({
+    'queued_file': {
+        'level': 'INFO',
+        '()': 'brandwerder_suite.log.QueueListenerHandler',
+        'formatter': 'verbose',
+        'handlers': [{
+            'class': 'logging.handlers.WatchedFileHandler',
+            'filename': os.path.join(BASE_DIR, 'logs', 'mailmansuite.log'),
+        }],
+    },
+    'queued_mail_admins': {
+        'level': 'ERROR',
+        '()': 'brandwerder_suite.log.QueueListenerHandler',
+        'filters': ['require_debug_false'],
+        'handlers': [{
+            'class': 'brandwerder_suite.log.BatchingAdminEmailHandler',
+            'interval': 300,
+            'max_errors': 100,
+        }],
+    },
+})
+LOGGING['loggers']['django.request']['handlers'] = [
+    'queued_mail_admins', 'queued_file']
+LOGGING['loggers']['django']['handlers'] = ['queued_file']
+LOGGING['loggers']['postorius']['handlers'] = ['console', 'queued_file']
+
+
+#
+# Full-text search engine
+#
+# SQLite FTS5 instead of Whoosh: updates are written in batches from a queue,
+# segments are merged by `manage.py fts_index merge` (cron) and
+# `manage.py fts_index rebuild` rebuilds the index in batches.
+HAYSTACK_CONNECTIONS = {
+    'default': {
+        'ENGINE': 'brandwerder_suite.search_backend.SQLiteFTSEngine',
+        'PATH': os.path.join(BASE_DIR, 'fulltext_index_fts'),
+        'QUEUE': True,
+        'BATCH_SIZE': 200,
+    },
+}
+
+
+#
+# Asynchronous tasks
+#
+# Interactive tasks run on the default cluster, bulk jobs (e.g.
+# `manage.py fts_index rebuild --bulk`) on the `bulk` cluster (see
+# brandwerder_suite.tasks). Workers are recycled to keep their memory in check. The broker is Redis when
+# Q_CLUSTER_REDIS is set, otherwise the ORM broker on a separate SQLite
+# database instead of MySQL (`manage.py migrate django_q --database djangoq`).
+Q_CLUSTER_REDIS = None
+# Q_CLUSTER_REDIS = {'host': '127.0.0.1', 'port': 6379, 'db': 2}
+
+Q_CLUSTER = {
+    'name': 'interactive',
+    'workers': 4,
+    'recycle': 500,
+    'timeout': 60,
+    'retry': 120,
+    'max_attempts': 3,
+    'queue_limit': 20,
+    'bulk': 1,
+    'poll': 0.5,
+    'save_limit': 100,
+    'ALT_CLUSTERS': {
+        'bulk': {
+            'workers': 2,
+            'recycle': 50,
+            'timeout': 3600,
+            'retry': 3900,
+            'queue_limit': 100,
+            'bulk': 20,
+            'poll': 2,
+        },
+    },
+}
+
+if Q_CLUSTER_REDIS:
+    Q_CLUSTER['redis'] = Q_CLUSTER_REDIS
+else:
+    DATABASES['djangoq'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'djangoq.db'),
+    }
+    Q_CLUSTER['orm'] = 'djangoq'
@@ -17,6 +17,7 @@
 # Postorius.  If not, see <http://www.gnu.org/licenses/>.
 
 
+from django.conf import settings
 from django.conf.urls import include, url
 from django.contrib import admin
 from django.urls import reverse_lazy
@@ -33,3 +34,7 @@ urlpatterns = [
     # Django admin
     url(r'^admin/', admin.site.urls),
 ]
+
+if 'brandwerder_suite' in settings.INSTALLED_APPS:
+    urlpatterns.append(
+        url(r'^brandwerder/', include('brandwerder_suite.urls')))
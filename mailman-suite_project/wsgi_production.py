@@ -0,0 +1,20 @@
+"""
+Production WSGI entry point for lists.brandwerder.de
+
+Like wsgi.py, but with settings_production and a warm-up of the application
+when it is loaded. Load it once in the master process before the workers are
+forked (gunicorn: see gunicorn.conf.py, mod_wsgi: WSGIImportScript), then the
+first request after a restart does not pay for the imports.
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "settings_production")
+
+application = get_wsgi_application()
+
+from brandwerder_suite.warmup import warm_up  # flake8: noqa
+
+warm_up()